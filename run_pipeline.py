@@ -1,20 +1,66 @@
 import argparse
+import multiprocessing
 from pathlib import Path
 
 from src.tamacore.pipeline import run_pipeline
+from src.tamacore.transfer import TRANSFER_MODES
+from src.tamacore.watch import DEBOUNCE
 
 
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--assets-dir", default="assets", help="Input assets folder")
-    ap.add_argument("--game-dir", required=True, help="Path to tamacore-game folder (create/update game.json inside)")
+    ap.add_argument("--game-dir", help="Path to tamacore-game folder (create/update game.json inside)")
+    ap.add_argument(
+        "--transfer",
+        choices=TRANSFER_MODES,
+        default="copy",
+        help="How images are placed into the game folder (falls back to copy if unsupported)",
+    )
+    ap.add_argument(
+        "--tools",
+        action="store_true",
+        help="First run the asset tools (ingest -> ... -> pack/scaffold), skipping unchanged steps",
+    )
+    ap.add_argument("--jobs", type=int, help="Tool steps run at the same time (default: CPU count)")
+    ap.add_argument("--force", action="store_true", help="Run every tool step even if its inputs are unchanged")
+    ap.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running: rebuild what changed files affect (input/extra_images, _drop_all, assets dir)",
+    )
+    ap.add_argument("--poll", action="store_true", help="Watch by polling instead of inotify")
+    ap.add_argument("--debounce", type=float, default=DEBOUNCE, help="Seconds of quiet before a rebuild")
+    ap.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the JSON Patch (RFC 6902) game.json would get; copy and write nothing",
+    )
+    ap.add_argument(
+        "--split",
+        action="store_true",
+        help="Save as a GDevelop folder project: layouts/, externalEvents/, externalLayouts/ files",
+    )
     args = ap.parse_args()
+    if args.game_dir is None and not args.tools:
+        ap.error("--game-dir is required (unless only --tools is run)")
 
     run_pipeline(
         assets_dir=Path(args.assets_dir),
-        game_dir=Path(args.game_dir),
+        game_dir=Path(args.game_dir) if args.game_dir else None,
+        transfer=args.transfer,
+        tools=args.tools,
+        jobs=args.jobs,
+        force=args.force,
+        watch_mode=args.watch,
+        polling=args.poll,
+        debounce=args.debounce,
+        dry_run=args.dry_run,
+        split=args.split,
     )
 
 
 if __name__ == "__main__":
+    # frozen exe: let worker processes (atlas_pack --jobs) start as workers, not the CLI
+    multiprocessing.freeze_support()
     main()
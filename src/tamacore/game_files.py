@@ -1,10 +1,18 @@
 from __future__ import annotations
 
-import shutil
 from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .hash_cache import HashCache, sha256_file
+from .transfer import transfer_file
+from .utils import read_json, write_json
 
 IMG_EXTS = {".png", ".jpg", ".jpeg", ".webp"}
 
+# Lives in the game dir; remembers what was copied so re-runs only touch changed sources.
+MANIFEST_NAME = ".tamacore_assets.json"
+MANIFEST_VERSION = 1
+
 
 def collect_images(assets_dir: Path) -> list[Path]:
     imgs: list[Path] = []
@@ -14,23 +22,118 @@ def collect_images(assets_dir: Path) -> list[Path]:
     return sorted(imgs)
 
 
+def _plan(assets_dir: Path, target_rel_dir: str) -> Tuple[Dict[str, str], Dict[str, Path]]:
+    mapping: dict[str, str] = {}
+    # Same file name from different subfolders: the last one wins (as with plain overwrite).
+    winners: dict[str, Path] = {}
+    for src in collect_images(assets_dir):
+        winners[src.name] = src
+        logical = src.stem.lower()
+        mapping[logical] = str(Path(target_rel_dir) / src.name).replace("\\", "/")
+    return mapping, winners
+
+
+def plan_image_map(assets_dir: Path, target_rel_dir: str = "assets/generated") -> dict[str, str]:
+    """The mapping copy_images_into_game would return, without touching any file."""
+    return _plan(assets_dir, target_rel_dir)[0]
+
+
+def _load_manifest(game_dir: Path) -> Dict[str, Any]:
+    p = game_dir / MANIFEST_NAME
+    if p.exists():
+        try:
+            data = read_json(p)
+            if data.get("version") == MANIFEST_VERSION and isinstance(data.get("targets"), dict):
+                return data
+        except Exception:
+            pass
+    return {"version": MANIFEST_VERSION, "targets": {}}
+
+
+def _is_unchanged(
+    entry: Optional[Dict[str, Any]], src: Path, dst: Path, transfer: str, digest: Optional[str] = None
+) -> bool:
+    """
+    True when dst still holds the bytes recorded for src (placed with the same transfer mode).
+    Without a digest only size + mtime are compared (no file read).
+    """
+    if not entry or entry.get("dst") != dst.name or entry.get("transfer", "copy") != transfer:
+        return False
+    try:
+        st = src.stat()
+        if dst.stat().st_size != st.st_size:
+            return False
+    except FileNotFoundError:
+        return False
+    if digest is None:
+        return entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns
+    return entry.get("sha256") == digest
+
+
 def copy_images_into_game(
     assets_dir: Path,
     game_dir: Path,
     target_rel_dir: str = "assets/generated",
+    stats: Optional[Dict[str, int]] = None,
+    transfer: str = "copy",
+    hash_cache: Optional[HashCache] = None,
 ) -> dict[str, str]:
     """
     Copies images into game_dir/target_rel_dir.
     Returns mapping: logical_name -> relative posix path.
+
+    Incremental: a manifest in game_dir records size, mtime and sha256 per source.
+    Unchanged sources are skipped, changed ones recopied and outputs of deleted
+    sources pruned. If `stats` is given it receives copied/skipped/removed counts.
+    `transfer` selects copy/hardlink/reflink/symlink (see transfer.TRANSFER_MODES).
+    With a `hash_cache`, digests of touched-but-identical sources are not re-read.
     """
     out_dir = game_dir / target_rel_dir
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    mapping: dict[str, str] = {}
-    for src in collect_images(assets_dir):
-        dst = out_dir / src.name
-        shutil.copy2(src, dst)
-        logical = src.stem.lower()
-        mapping[logical] = str(Path(target_rel_dir) / dst.name).replace("\\", "/")
+    manifest = _load_manifest(game_dir)
+    target_key = Path(target_rel_dir).as_posix()
+    prev: Dict[str, Dict[str, Any]] = manifest["targets"].get(target_key, {})
+    cur: Dict[str, Dict[str, Any]] = {}
+    counts = {"copied": 0, "skipped": 0, "removed": 0}
+
+    mapping, winners = _plan(assets_dir, target_rel_dir)
+    for dst_name, src in winners.items():
+        dst = out_dir / dst_name
+        rel = src.relative_to(assets_dir).as_posix()
+        entry = prev.get(rel)
+
+        digest = entry.get("sha256") if entry else None
+        if _is_unchanged(entry, src, dst, transfer):
+            counts["skipped"] += 1
+        else:
+            digest = hash_cache.digest(src) if hash_cache is not None else sha256_file(src)
+            if _is_unchanged(entry, src, dst, transfer, digest):
+                counts["skipped"] += 1
+            else:
+                transfer_file(src, dst, transfer)
+                counts["copied"] += 1
+
+        st = src.stat()
+        cur[rel] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": digest,
+            "dst": dst_name,
+            "transfer": transfer,
+        }
+
+    for rel, entry in prev.items():
+        if rel in cur or entry.get("dst") in winners:
+            continue
+        stale = out_dir / str(entry.get("dst", ""))
+        if entry.get("dst") and (stale.is_file() or stale.is_symlink()):
+            stale.unlink()
+            counts["removed"] += 1
+
+    manifest["targets"][target_key] = cur
+    write_json(game_dir / MANIFEST_NAME, manifest)
 
+    if stats is not None:
+        stats.update(counts)
     return mapping
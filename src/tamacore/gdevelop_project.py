@@ -1,12 +1,105 @@
 from __future__ import annotations
 
+import copy
+import re
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
 
+from . import json_patch
 from .utils import read_json, write_json
 
+# GDevelop "folderProject" layout: these lists hold stubs in game.json and each
+# entry lives in <section>/<slug>.json next to it.
+SPLIT_SECTIONS = ("layouts", "externalEvents", "externalLayouts")
+SPLIT_MARKER = "__REFERENCE_TO_SPLIT_OBJECT"
 
-def load_or_create_project(game_json: Path) -> Dict[str, Any]:
+# (section, entry name) -> referenceTo ("/layouts/main")
+SplitRefs = Dict[Tuple[str, str], str]
+
+
+def _read_project(game_json: Path) -> Tuple[Dict[str, Any], SplitRefs]:
+    """game.json with split entries loaded back in from their files."""
+    data = read_json(game_json)
+    refs: SplitRefs = {}
+    for section in SPLIT_SECTIONS:
+        items = data.get(section)
+        if not isinstance(items, list):
+            continue
+        for i, item in enumerate(items):
+            if isinstance(item, dict) and item.get(SPLIT_MARKER):
+                ref = item["referenceTo"]
+                entry = read_json(game_json.parent / (ref.lstrip("/") + ".json"))
+                items[i] = entry
+                refs[(section, entry.get("name", ""))] = ref
+    return data, refs
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "untitled"
+
+
+def split_project(project: Dict[str, Any], refs: Optional[SplitRefs] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    (game.json document with stubs, referenceTo -> entry). Entries that were
+    already split keep their file; new ones get /<section>/<slug of name>.
+    """
+    refs = refs or {}
+    reserved = set(refs.values())
+    main = dict(project)
+    parts: Dict[str, Any] = {}
+    for section in SPLIT_SECTIONS:
+        items = project.get(section)
+        if not isinstance(items, list):
+            continue
+        stubs = []
+        for entry in items:
+            name = entry.get("name", "") if isinstance(entry, dict) else ""
+            ref = refs.get((section, name))
+            if ref is None or ref in parts:
+                base = f"/{section}/{_slug(name)}"
+                ref, n = base, 2
+                while ref in parts or ref in reserved:
+                    ref, n = f"{base}-{n}", n + 1
+            parts[ref] = entry
+            stubs.append({SPLIT_MARKER: True, "referenceTo": ref})
+        main[section] = stubs
+    return main, parts
+
+
+def write_project(
+    game_json: Path,
+    project: Dict[str, Any],
+    refs: Optional[SplitRefs] = None,
+    touched: Optional[Set[Tuple[str, int]]] = None,
+) -> int:
+    """
+    Writes game.json, split into per-entry files when properties.folderProject is
+    set. touched: (section, index) entries that may have changed; other entries
+    whose file exists are not even serialized. write_json skips identical files
+    anyway. Files of entries that no longer exist are removed. Returns files written.
+    """
+    if not project.get("properties", {}).get("folderProject"):
+        return int(write_json(game_json, project))
+
+    main, parts = split_project(project, refs)
+    written = int(write_json(game_json, main))
+    positions = {
+        stub["referenceTo"]: (section, i) for section in SPLIT_SECTIONS for i, stub in enumerate(main.get(section, []))
+    }
+    for ref, entry in parts.items():
+        path = game_json.parent / (ref.lstrip("/") + ".json")
+        if touched is not None and positions[ref] not in touched and path.exists():
+            continue
+        written += write_json(path, entry)
+
+    for section in SPLIT_SECTIONS:
+        for old in (game_json.parent / section).glob("*.json"):
+            if f"/{section}/{old.stem}" not in parts:
+                old.unlink()
+    return written
+
+
+def load_or_create_project(game_json: Path, folder_project: bool = False) -> Dict[str, Any]:
     """
     Create a GDevelop 5 compatible project JSON structure.
     This matches the schema used by real exported examples:
@@ -18,14 +111,15 @@ def load_or_create_project(game_json: Path) -> Dict[str, Any]:
     """
     if game_json.exists():
         # If it's already a project, load and then we will patch/ensure required keys.
-        data = read_json(game_json)
+        # A split (folderProject) project is joined back into one document.
+        data, _ = _read_project(game_json)
         return data
 
     return {
         "firstLayout": "Main",
         "gdVersion": {"build": 0, "major": 5, "minor": 0, "revision": 0},
         "properties": {
-            "folderProject": False,
+            "folderProject": folder_project,
             "useExternalSourceFiles": False,
             "projectFile": str(game_json).replace("\\", "\\\\"),
             "name": "TamaCore",
@@ -84,20 +178,18 @@ def _resources(project: Dict[str, Any]) -> list[dict]:
     return project["resources"]["resources"]
 
 
-def ensure_resource(project: Dict[str, Any], name: str, kind: str, file_path: str) -> None:
-    res = _resources(project)
-    for r in res:
-        if isinstance(r, dict) and r.get("name") == name:
-            r["kind"] = kind
-            r["file"] = file_path
-            r.setdefault("metadata", "")
-            r.setdefault("userAdded", True)
-            r.setdefault("alwaysLoaded", False)
-            # GDevelop expects this for images
-            if kind == "image":
-                r.setdefault("smoothed", True)
-            return
+def _update_resource(r: Dict[str, Any], kind: str, file_path: str) -> None:
+    r["kind"] = kind
+    r["file"] = file_path
+    r.setdefault("metadata", "")
+    r.setdefault("userAdded", True)
+    r.setdefault("alwaysLoaded", False)
+    # GDevelop expects this for images
+    if kind == "image":
+        r.setdefault("smoothed", True)
+
 
+def _new_resource(name: str, kind: str, file_path: str) -> Dict[str, Any]:
     entry = {
         "alwaysLoaded": False,
         "file": file_path,
@@ -108,16 +200,20 @@ def ensure_resource(project: Dict[str, Any], name: str, kind: str, file_path: st
     }
     if kind == "image":
         entry["smoothed"] = True
-    res.append(entry)
+    return entry
 
 
-def get_or_create_layout(project: Dict[str, Any], name: str) -> Dict[str, Any]:
-    project.setdefault("layouts", [])
-    for l in project["layouts"]:
-        if isinstance(l, dict) and l.get("name") == name:
-            return l
+def ensure_resource(project: Dict[str, Any], name: str, kind: str, file_path: str) -> None:
+    res = _resources(project)
+    for r in res:
+        if isinstance(r, dict) and r.get("name") == name:
+            _update_resource(r, kind, file_path)
+            return
+    res.append(_new_resource(name, kind, file_path))
+
 
-    layout = {
+def _new_layout(name: str) -> Dict[str, Any]:
+    return {
         # Required-ish layout keys (seen in official examples)
         "name": name,
         "title": "",
@@ -171,28 +267,102 @@ def get_or_create_layout(project: Dict[str, Any], name: str) -> Dict[str, Any]:
         ],
         "behaviorsSharedData": [],
     }
+
+
+def get_or_create_layout(project: Dict[str, Any], name: str) -> Dict[str, Any]:
+    project.setdefault("layouts", [])
+    for l in project["layouts"]:
+        if isinstance(l, dict) and l.get("name") == name:
+            return l
+
+    layout = _new_layout(name)
     project["layouts"].append(layout)
     return layout
 
 
-def _ensure_layout_object(layout: Dict[str, Any], obj: Dict[str, Any]) -> None:
-    layout.setdefault("objects", [])
-    for existing in layout["objects"]:
-        if isinstance(existing, dict) and existing.get("name") == obj.get("name"):
+def _upsert_named(items: list, entry: Dict[str, Any]) -> None:
+    for existing in items:
+        if isinstance(existing, dict) and existing.get("name") == entry.get("name"):
             existing.clear()
-            existing.update(obj)
+            existing.update(entry)
             return
-    layout["objects"].append(obj)
+    items.append(entry)
+
+
+def _ensure_layout_object(layout: Dict[str, Any], obj: Dict[str, Any]) -> None:
+    _upsert_named(layout.setdefault("objects", []), obj)
 
 
 def _ensure_instance(layout: Dict[str, Any], inst: Dict[str, Any]) -> None:
-    layout.setdefault("instances", [])
-    for existing in layout["instances"]:
-        if isinstance(existing, dict) and existing.get("name") == inst.get("name"):
+    _upsert_named(layout.setdefault("instances", []), inst)
+
+
+def _name_index(items: list) -> Dict[Any, Dict[str, Any]]:
+    # the first entry with a name wins, like the linear scans above
+    index: Dict[Any, Dict[str, Any]] = {}
+    for it in items:
+        if isinstance(it, dict):
+            index.setdefault(it.get("name"), it)
+    return index
+
+
+class ProjectIndex:
+    """
+    Name -> entry indexes over a loaded project dict, built once and kept in step
+    with every insert/replace made through it. Same results as the module-level
+    helpers, but each upsert is a dict lookup instead of a list scan, so
+    registering N resources in a project with M is O(N + M), not O(N * M).
+    Edits made to the project dict behind its back are not seen.
+    """
+
+    def __init__(self, project: Dict[str, Any]):
+        self.project = project
+        self._resources = _name_index(_resources(project))
+        self._layouts = _name_index(project.setdefault("layouts", []))
+        # id(objects / instances list) -> name index, built on first use per layout
+        self._objects: Dict[int, Dict[Any, Dict[str, Any]]] = {}
+        self._instances: Dict[int, Dict[Any, Dict[str, Any]]] = {}
+
+    def ensure_resource(self, name: str, kind: str, file_path: str) -> None:
+        r = self._resources.get(name)
+        if r is not None:
+            _update_resource(r, kind, file_path)
+            return
+        r = _new_resource(name, kind, file_path)
+        _resources(self.project).append(r)
+        self._resources[name] = r
+
+    def ensure_resources(self, items: Iterable[Tuple[str, str, str]]) -> None:
+        """Bulk upsert of (name, kind, file_path)."""
+        for name, kind, file_path in items:
+            self.ensure_resource(name, kind, file_path)
+
+    def get_or_create_layout(self, name: str) -> Dict[str, Any]:
+        layout = self._layouts.get(name)
+        if layout is None:
+            layout = _new_layout(name)
+            self.project["layouts"].append(layout)
+            self._layouts[name] = layout
+        return layout
+
+    @staticmethod
+    def _upsert(cache: Dict[int, Dict[Any, Dict[str, Any]]], items: list, entry: Dict[str, Any]) -> None:
+        index = cache.get(id(items))
+        if index is None:
+            index = cache[id(items)] = _name_index(items)
+        existing = index.get(entry.get("name"))
+        if existing is not None:
             existing.clear()
-            existing.update(inst)
+            existing.update(entry)
             return
-    layout["instances"].append(inst)
+        items.append(entry)
+        index[entry.get("name")] = entry
+
+    def ensure_layout_object(self, layout: Dict[str, Any], obj: Dict[str, Any]) -> None:
+        self._upsert(self._objects, layout.setdefault("objects", []), obj)
+
+    def ensure_instance(self, layout: Dict[str, Any], inst: Dict[str, Any]) -> None:
+        self._upsert(self._instances, layout.setdefault("instances", []), inst)
 
 
 def make_sprite_object(name: str, image_resource_name: str) -> Dict[str, Any]:
@@ -250,12 +420,12 @@ def make_text_object(name: str, initial_text: str) -> Dict[str, Any]:
     }
 
 
-def produce_game(game_dir: Path, image_map: Dict[str, str]) -> Path:
-    game_json = game_dir / "game.json"
-    project = load_or_create_project(game_json)
-
+def _generate(project: Dict[str, Any], image_map: Dict[str, str], split: bool = False) -> None:
+    """Upserts the generated resources, objects and instances into project."""
     # Ensure top-level required keys exist even if we loaded an older/invalid file
     project.setdefault("firstLayout", "Main")
+    if split:
+        project.setdefault("properties", {})["folderProject"] = True
     if not isinstance(project.get("gdVersion"), dict):
         project["gdVersion"] = {"build": 0, "major": 5, "minor": 0, "revision": 0}
     project.setdefault("resources", {"resources": [], "resourceFolders": []})
@@ -267,11 +437,12 @@ def produce_game(game_dir: Path, image_map: Dict[str, str]) -> Path:
     project.setdefault("objectsGroups", [])
     project.setdefault("variables", [])
 
+    index = ProjectIndex(project)
+
     # Resources
-    for logical, rel_file in image_map.items():
-        ensure_resource(project, name=logical, kind="image", file_path=rel_file)
+    index.ensure_resources((logical, "image", rel_file) for logical, rel_file in image_map.items())
 
-    layout = get_or_create_layout(project, "Main")
+    layout = index.get_or_create_layout("Main")
     project["firstLayout"] = "Main"
 
     # Choose resources
@@ -281,14 +452,14 @@ def produce_game(game_dir: Path, image_map: Dict[str, str]) -> Path:
 
     # Objects
     if bg_res:
-        _ensure_layout_object(layout, make_sprite_object("Background", bg_res))
-    _ensure_layout_object(layout, make_sprite_object("Player", player_res))
-    _ensure_layout_object(layout, make_sprite_object("Coin", coin_res))
-    _ensure_layout_object(layout, make_text_object("HUD", "Score: 0"))
+        index.ensure_layout_object(layout, make_sprite_object("Background", bg_res))
+    index.ensure_layout_object(layout, make_sprite_object("Player", player_res))
+    index.ensure_layout_object(layout, make_sprite_object("Coin", coin_res))
+    index.ensure_layout_object(layout, make_text_object("HUD", "Score: 0"))
 
     # Instances (note: field is "name" in GDevelop examples)
     if bg_res:
-        _ensure_instance(
+        index.ensure_instance(
             layout,
             {
                 "name": "Background",
@@ -307,7 +478,7 @@ def produce_game(game_dir: Path, image_map: Dict[str, str]) -> Path:
             },
         )
 
-    _ensure_instance(
+    index.ensure_instance(
         layout,
         {
             "name": "Player",
@@ -325,7 +496,7 @@ def produce_game(game_dir: Path, image_map: Dict[str, str]) -> Path:
             "initialVariables": [],
         },
     )
-    _ensure_instance(
+    index.ensure_instance(
         layout,
         {
             "name": "Coin",
@@ -343,7 +514,7 @@ def produce_game(game_dir: Path, image_map: Dict[str, str]) -> Path:
             "initialVariables": [],
         },
     )
-    _ensure_instance(
+    index.ensure_instance(
         layout,
         {
             "name": "HUD",
@@ -362,9 +533,62 @@ def produce_game(game_dir: Path, image_map: Dict[str, str]) -> Path:
         },
     )
 
-    # Start with no events to guarantee project opens.
-    # We'll add events via a compatible schema after you confirm it opens.
-    layout["events"] = []
+    # Events are left alone: a new layout starts with none, edits made in
+    # GDevelop are kept.
+
+
+def _load(game_json: Path, split: bool) -> Tuple[Dict[str, Any], SplitRefs]:
+    if game_json.exists():
+        return _read_project(game_json)
+    return load_or_create_project(game_json, folder_project=split), {}
+
+
+def _plan(
+    game_dir: Path, image_map: Dict[str, str], split: bool
+) -> Tuple[Dict[str, Any], SplitRefs, json_patch.Patch]:
+    current, refs = _load(game_dir / "game.json", split)
+    desired = copy.deepcopy(current)
+    _generate(desired, image_map, split)
+    return current, refs, json_patch.diff(current, desired)
+
 
-    write_json(game_json, project)
+def game_patch(
+    game_dir: Path, image_map: Dict[str, str], split: bool = False
+) -> Tuple[Dict[str, Any], json_patch.Patch]:
+    """
+    (project as on disk, RFC 6902 patch of the generated changes). The project is
+    a fresh skeleton if game.json doesn't exist yet; split files are joined in.
+    """
+    current, _, patch = _plan(game_dir, image_map, split)
+    return current, patch
+
+
+def _touched(patch: json_patch.Patch) -> Optional[Set[Tuple[str, int]]]:
+    # (section, index) of split entries the patch reaches into; None = all of them
+    touched: Set[Tuple[str, int]] = set()
+    for op in patch:
+        parts = op["path"].split("/")
+        if op["path"] in ("", "/properties", "/properties/folderProject"):
+            return None
+        if len(parts) > 1 and parts[1] in SPLIT_SECTIONS:
+            if len(parts) == 2 or not parts[2].isdigit():
+                return None
+            touched.add((parts[1], int(parts[2])))
+    return touched
+
+
+def produce_game(game_dir: Path, image_map: Dict[str, str], split: bool = False) -> Path:
+    """
+    Applies only the generated upserts to game.json; everything else in the file
+    (events, editor settings, user objects) stays as it is. Nothing is written
+    when the patch is empty.
+    split=True switches the project to GDevelop's folderProject layout (layouts,
+    external events and external layouts in their own files); a project that is
+    already split stays split. Only files whose entries changed are rewritten.
+    """
+    game_json = game_dir / "game.json"
+    current, refs, patch = _plan(game_dir, image_map, split)
+    if patch or not game_json.exists():
+        project = json_patch.apply(current, patch)
+        write_project(game_json, project, refs, _touched(patch))
     return game_json
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+DEFAULT_CACHE_PATH = Path("output") / "reports" / "hash_cache.sqlite"
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class HashCache:
+    """
+    Persistent file digests keyed by (path, size, mtime_ns, inode).
+
+    Shared by dedupe, ingest and the game copy stage so an unchanged library is
+    never re-read. `algo` namespaces digests ("sha256" by default; dedupe also
+    stores its partial first/last-block hashes). Safe to use from worker threads.
+    """
+
+    def __init__(self, db_path: Path = DEFAULT_CACHE_PATH):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " path TEXT NOT NULL, algo TEXT NOT NULL,"
+            " size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " PRIMARY KEY (path, algo))"
+        )
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return os.path.abspath(path)
+
+    def lookup(self, path: Path, algo: str = "sha256", st: Optional[os.stat_result] = None) -> Optional[str]:
+        """Cached digest if the file's size/mtime/inode still match, else None."""
+        st = st or path.stat()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, inode, digest FROM hashes WHERE path = ? AND algo = ?",
+                (self._key(path), algo),
+            ).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns and row[2] == st.st_ino:
+            return row[3]
+        return None
+
+    def store(self, path: Path, digest: str, algo: str = "sha256", st: Optional[os.stat_result] = None) -> None:
+        st = st or path.stat()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO hashes (path, algo, size, mtime_ns, inode, digest) VALUES (?, ?, ?, ?, ?, ?)",
+                (self._key(path), algo, st.st_size, st.st_mtime_ns, st.st_ino, digest),
+            )
+
+    def digest(
+        self,
+        path: Path,
+        algo: str = "sha256",
+        compute: Callable[[Path], str] = sha256_file,
+    ) -> str:
+        """Cached digest, or compute(path) stored for next time."""
+        st = path.stat()
+        cached = self.lookup(path, algo, st)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return cached
+        with self._lock:
+            self.misses += 1
+        value = compute(path)
+        self.store(path, value, algo, st)
+        return value
+
+    def forget(self, path: Path) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM hashes WHERE path = ?", (self._key(path),))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def __enter__(self) -> "HashCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
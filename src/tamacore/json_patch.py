@@ -0,0 +1,103 @@
+"""
+RFC 6902 JSON Patch: diff() builds add/remove/replace operations that turn one
+document into another, apply() performs them in place.
+
+Objects are compared key by key and lists index by index (a grown list gets
+"add" at its end, a shrunk one "remove" from the back), so upserting a few
+entries into a big project yields a patch of a few operations.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+Patch = List[Dict[str, Any]]
+
+
+def escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _same(a: Any, b: Any) -> bool:
+    # 1 == 1.0 == True in Python, not in JSON
+    return type(a) is type(b) and a == b
+
+
+def diff(old: Any, new: Any, path: str = "") -> Patch:
+    if _same(old, new):
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: Patch = []
+        for k in old:
+            if k not in new:
+                ops.append({"op": "remove", "path": f"{path}/{escape(k)}"})
+        for k, v in new.items():
+            p = f"{path}/{escape(k)}"
+            if k not in old:
+                ops.append({"op": "add", "path": p, "value": v})
+            else:
+                ops.extend(diff(old[k], v, p))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        common = min(len(old), len(new))
+        for i in range(common):
+            ops.extend(diff(old[i], new[i], f"{path}/{i}"))
+        for i in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+        for i in range(common, len(new)):
+            ops.append({"op": "add", "path": f"{path}/{i}", "value": new[i]})
+        return ops
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _parent(doc: Any, path: str):
+    if not path.startswith("/"):
+        raise ValueError(f"Bad JSON pointer: {path!r}")
+    tokens = [unescape(t) for t in path[1:].split("/")]
+    target = doc
+    for t in tokens[:-1]:
+        target = target[int(t)] if isinstance(target, list) else target[t]
+    return target, tokens[-1]
+
+
+def apply(doc: Any, patch: Patch) -> Any:
+    """
+    Applies add/remove/replace in place and returns the document (a patch on the
+    root path returns the new value instead). Raises KeyError/IndexError/ValueError
+    if an operation doesn't fit the document.
+    """
+    for op in patch:
+        kind, path = op["op"], op["path"]
+        if path == "":
+            if kind == "remove":
+                raise ValueError("Can't remove the document root")
+            doc = op["value"]
+            continue
+        parent, key = _parent(doc, path)
+        if isinstance(parent, list):
+            if kind == "add":
+                idx = len(parent) if key == "-" else int(key)
+                if idx > len(parent):
+                    raise IndexError(f"{path}: index past the end")
+                parent.insert(idx, op["value"])
+            elif kind == "remove":
+                del parent[int(key)]
+            elif kind == "replace":
+                parent[int(key)] = op["value"]
+            else:
+                raise ValueError(f"Unsupported op: {kind}")
+        else:
+            if kind in ("remove", "replace") and key not in parent:
+                raise KeyError(f"{path}: no such member")
+            if kind == "remove":
+                del parent[key]
+            elif kind in ("add", "replace"):
+                parent[key] = op["value"]
+            else:
+                raise ValueError(f"Unsupported op: {kind}")
+    return doc
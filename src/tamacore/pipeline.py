@@ -1,19 +1,401 @@
 from __future__ import annotations
 
+import ast
+import fnmatch
+import hashlib
+import importlib
+import importlib.util
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
 
 from .assets_seed import ensure_assets_exist
-from .game_files import copy_images_into_game
-from .gdevelop_project import produce_game
+from .game_files import copy_images_into_game, plan_image_map
+from .gdevelop_project import game_patch, produce_game
+from .hash_cache import DEFAULT_CACHE_PATH, HashCache
+from .utils import json_dumps, read_json, write_json
+from .watch import DEBOUNCE, watch
 
+if TYPE_CHECKING:
+    from tools.file_index import FileIndex
+
+STATE_PATH = Path("output") / "reports" / "pipeline_state.json"
+STATE_VERSION = 2
+
+_RAW = Path("output") / "assets_raw"
+_DROP = _RAW / "_drop_all"
+_EXTRA = Path("input") / "extra_images"
+_SPRITE_DIRS = (_RAW / "ui", _RAW / "cosmetics", _RAW / "effects", _RAW / "backgrounds", _RAW / "pet")
+_CATEGORY_DIRS = _SPRITE_DIRS + (_RAW / "_unmapped",)
+_ATLAS_FILES = (Path("output") / "atlas" / "atlas*.png", Path("output") / "atlas" / "atlas*.json")
+# the project root: modules under it are fingerprinted as step code
+_ROOT = Path(__file__).resolve().parents[2]
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    One tool of the asset pipeline, run in-process as `module.main(argv)`.
+    argv=None calls main() for tools without an argument parser.
+    inputs/outputs are files, directories or file globs like output/atlas/atlas*.png
+    (relative to the working dir); a step waits for every earlier step whose
+    outputs it reads or whose files it touches.
+    indexed: outputs the tool keeps current in the shared file index itself
+    (added/removed/renamed); the other outputs are re-read after the step runs.
+    force_argv: extra arguments for a forced run (the tool's own cache bypass).
+    soft_deps: the tool copes with missing or stale inputs, so it still runs
+    (as it did in run.bat) when a step it waits for failed or was blocked.
+    """
+
+    name: str
+    module: str
+    inputs: Tuple[Path, ...] = ()
+    outputs: Tuple[Path, ...] = ()
+    argv: Optional[Tuple[str, ...]] = None
+    indexed: Tuple[Path, ...] = ()
+    force_argv: Tuple[str, ...] = ()
+    soft_deps: bool = False
+
+
+# Declaration order is the order run.bat used; dependencies are derived from the paths.
+TOOL_STEPS: Tuple[Step, ...] = (
+    Step("ingest", "tools.ingest_extra_images", (_EXTRA,), (_DROP,), (), indexed=(_DROP,)),
+    Step(
+        "scan_and_map",
+        "tools.asset_scan_and_map",
+        (_DROP,),
+        _CATEGORY_DIRS + (_RAW / "mapping.json",),
+        (),
+        indexed=_CATEGORY_DIRS,
+        force_argv=("--force",),
+    ),
+    Step("naming_pro", "tools.naming_pro", _CATEGORY_DIRS, _CATEGORY_DIRS, indexed=_CATEGORY_DIRS),
+    Step("dedupe", "tools.dedupe", _CATEGORY_DIRS, _CATEGORY_DIRS, (), indexed=_CATEGORY_DIRS),
+    Step("soft_validate", "tools.soft_validate", _CATEGORY_DIRS, (Path("output") / "reports" / "soft_validation.txt",)),
+    Step("atlas_pack", "tools.atlas_pack", _SPRITE_DIRS, _ATLAS_FILES, (), force_argv=("--force",)),
+    Step(
+        "gdevelop_pack_generate",
+        "tools.gdevelop_pack_generate",
+        _ATLAS_FILES + (_RAW / "mapping.json",),
+        (Path("output") / "gdevelop_pack",),
+        soft_deps=True,  # writes the runtime/catalog even without an atlas
+    ),
+    Step("game_scaffold_generate", "tools.game_scaffold_generate", (), (Path("output") / "scaffold",)),
+)
+
+
+def _is_glob(p: Path) -> bool:
+    return "*" in p.name
+
+
+def _overlaps(a: Path, b: Path) -> bool:
+    # a glob stands for its folder (two globs in one folder may match the same files)
+    a = a.parent if _is_glob(a) else a
+    b = b.parent if _is_glob(b) else b
+    return a == b or a in b.parents or b in a.parents
+
+
+def _touches(paths: Tuple[Path, ...], others: Tuple[Path, ...]) -> bool:
+    return any(_overlaps(a, b) for a in paths for b in others)
+
+
+def step_dependencies(steps: Tuple[Step, ...]) -> Dict[str, List[str]]:
+    """
+    name -> earlier steps it must wait for: it reads their outputs, writes what
+    they read, or writes the same paths (in-place tools like naming_pro/dedupe).
+    """
+    deps: Dict[str, List[str]] = {}
+    for i, step in enumerate(steps):
+        deps[step.name] = [
+            prev.name
+            for prev in steps[:i]
+            if _touches(step.inputs + step.outputs, prev.outputs) or _touches(step.outputs, prev.inputs)
+        ]
+    return deps
+
+
+def fingerprint_paths(paths: Tuple[Path, ...], index: Optional["FileIndex"] = None) -> str:
+    """
+    Stat-only fingerprint (path, size, mtime) of files and directory trees, read
+    from the shared file index so the tools and the runner scan each folder once.
+    A missing path counts as an empty directory.
+    """
+    if index is None:
+        from tools.file_index import shared_index
+
+        index = shared_index()
+    entries: List[str] = []
+    for p in paths:
+        if _is_glob(p):
+            found = [e for e in index.files(p.parent) if fnmatch.fnmatch(e.path.name, p.name)]
+        else:
+            entry = index.get(p)
+            found = [entry] if entry is not None else index.walk(p)
+        entries.extend(f"{e.path.as_posix()}|{e.size}|{e.mtime_ns}" for e in found)
+    return hashlib.sha1("\n".join(sorted(entries)).encode("utf-8")).hexdigest()
+
+
+def _outputs_exist(step: Step, index: "FileIndex") -> bool:
+    for p in step.outputs:
+        if _is_glob(p):
+            if not any(fnmatch.fnmatch(e.path.name, p.name) for e in index.files(p.parent)):
+                return False
+        elif not p.exists():
+            return False
+    return True
+
+
+def _module_file(name: str) -> Optional[Path]:
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+        return None
+    path = Path(spec.origin).resolve()
+    return path if _ROOT in path.parents else None
+
+
+@lru_cache(maxsize=None)
+def project_modules(name: str) -> Tuple[Path, ...]:
+    """
+    Source files of module `name` and every project module it imports, directly
+    or through other project modules (function-level imports included).
+    Standard library and installed packages are left out.
+    """
+    seen: Dict[str, Path] = {}
+    stack = [name]
+    while stack:
+        mod = stack.pop()
+        if mod in seen:
+            continue
+        path = _module_file(mod)
+        if path is None:
+            continue
+        seen[mod] = path
+        package = mod if path.name == "__init__.py" else mod.rpartition(".")[0]
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Import):
+                stack.extend(a.name for a in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                base = node.module or ""
+                if node.level:
+                    parts = package.split(".")
+                    parent = ".".join(parts[: len(parts) - node.level + 1])
+                    base = f"{parent}.{base}" if base else parent
+                stack.append(base)
+                # `from pkg import module` imports a module, not just a name
+                stack.extend(f"{base}.{a.name}" for a in node.names)
+    return tuple(sorted(set(seen.values())))
+
+
+def _step_inputs(step: Step) -> Tuple[Path, ...]:
+    # the tool's code, the project modules it imports and the shared config count as inputs too
+    return step.inputs + project_modules(step.module) + project_modules("tools.config")
+
+
+def _fingerprints(step: Step, index: "FileIndex") -> Dict[str, str]:
+    # outputs too: a deleted or hand-edited atlas page makes the step run again
+    return {
+        "inputs": fingerprint_paths(_step_inputs(step), index),
+        "outputs": fingerprint_paths(step.outputs, index),
+    }
+
+
+def _load_state(state_path: Path) -> Dict[str, Any]:
+    if state_path.exists():
+        try:
+            data = read_json(state_path)
+            if data.get("version") == STATE_VERSION and isinstance(data.get("steps"), dict):
+                return data
+        except Exception:
+            pass
+    return {"version": STATE_VERSION, "steps": {}}
+
+
+def run_steps(
+    steps: Tuple[Step, ...] = TOOL_STEPS,
+    jobs: Optional[int] = None,
+    force: bool = False,
+    state_path: Path = STATE_PATH,
+    changed: Optional[Set[Path]] = None,
+) -> Dict[str, str]:
+    """
+    Runs steps as a DAG: a step starts once its dependencies are done, independent
+    steps share a thread pool. A step is skipped when its input fingerprint equals
+    the one recorded at the end of the last run that completed it and all its
+    outputs exist. Fingerprints go to state_path (output/reports/pipeline_state.json).
+    changed: only consider steps reading these paths (plus everything downstream of
+    a step that ran); the rest are "unaffected" and not even fingerprinted.
+    Returns name -> "ran" | "skipped" | "unaffected" | "failed" | "blocked".
+    """
+    from tools.file_index import reset_shared_index
+
+    # one directory scan per run, shared by every tool step and the fingerprints
+    index = reset_shared_index()
+    deps = step_dependencies(steps)
+    by_name = {s.name: s for s in steps}
+    state = _load_state(state_path)
+    lock = threading.Lock()
+    status: Dict[str, str] = {}
+
+    def run_one(step: Step) -> str:
+        if (
+            changed is not None
+            and not _touches(step.inputs, tuple(changed))
+            and not any(status.get(d) == "ran" for d in deps[step.name])
+        ):
+            return "unaffected"
+        inputs = _step_inputs(step)
+        prev = state["steps"].get(step.name)
+        if (
+            not force
+            and prev is not None
+            and prev.get("inputs") == fingerprint_paths(inputs, index)
+            and _outputs_exist(step, index)
+            and prev.get("outputs") == fingerprint_paths(step.outputs, index)
+        ):
+            print(f"[i] {step.name}: inputs unchanged, skipped")
+            return "skipped"
+        mod = importlib.import_module(step.module)
+        if step.argv is None:
+            mod.main()
+        else:
+            mod.main(list(step.argv) + (list(step.force_argv) if force else []))
+        for p in step.outputs:
+            if p not in step.indexed:
+                index.invalidate(p.parent if _is_glob(p) else p)
+        # recorded after the run: in-place tools change their own inputs
+        with lock:
+            state["steps"][step.name] = _fingerprints(step, index)
+            write_json(state_path, state)
+        return "ran"
+
+    pending = [s.name for s in steps]
+    running: Dict[Any, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs or os.cpu_count() or 1)) as pool:
+        while pending or running:
+            for name in list(pending):
+                waits = [status.get(d) for d in deps[name]]
+                if not by_name[name].soft_deps and any(w in ("failed", "blocked") for w in waits):
+                    status[name] = "blocked"
+                    pending.remove(name)
+                elif all(w is not None for w in waits):
+                    running[pool.submit(run_one, by_name[name])] = name
+                    pending.remove(name)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    status[name] = fut.result()
+                except BaseException as e:  # tools signal errors with SystemExit too
+                    print(f"[!] {name} failed: {e}")
+                    status[name] = "failed"
+
+    # Later steps that rewrite a step's inputs or outputs (dedupe after naming_pro)
+    # always depend on it, so the end state is what the step would see next time.
+    for step in steps:
+        if status[step.name] in ("ran", "skipped"):
+            state["steps"][step.name] = _fingerprints(step, index)
+    write_json(state_path, state)
+    return status
+
+
+def _run_tools(jobs: Optional[int], force: bool, changed: Optional[Set[Path]] = None) -> bool:
+    status = run_steps(TOOL_STEPS, jobs=jobs, force=force, changed=changed)
+    summary = ", ".join(f"{s.name} {status[s.name]}" for s in TOOL_STEPS)
+    print("[OK] Tool steps:", summary)
+    return not any(s in ("failed", "blocked") for s in status.values())
+
+
+def _run_game(assets_dir: Path, game_dir: Path, transfer: str, dry_run: bool = False, split: bool = False) -> None:
+    if dry_run:
+        # no placeholders, copies or writes: just what game.json would get
+        image_map = plan_image_map(assets_dir, "assets/generated")
+        if not image_map:
+            print("[DRY] No images in", assets_dir, "(a real run seeds placeholders)")
+            return
+        _, patch = game_patch(game_dir, image_map, split)
+        print(json_dumps(patch))
+        print(f"[DRY] {len(patch)} patch operation(s) for {game_dir / 'game.json'}, nothing written")
+        return
 
-def run_pipeline(assets_dir: Path, game_dir: Path) -> None:
     ensure_assets_exist(assets_dir)
     game_dir.mkdir(parents=True, exist_ok=True)
 
-    image_map = copy_images_into_game(assets_dir=assets_dir, game_dir=game_dir, target_rel_dir="assets/generated")
-    game_json = produce_game(game_dir, image_map)
+    stats: dict[str, int] = {}
+    with HashCache(DEFAULT_CACHE_PATH) as cache:
+        image_map = copy_images_into_game(
+            assets_dir=assets_dir,
+            game_dir=game_dir,
+            target_rel_dir="assets/generated",
+            stats=stats,
+            transfer=transfer,
+            hash_cache=cache,
+        )
+    game_json = produce_game(game_dir, image_map, split)
 
     print("[OK] Copied images to:", (game_dir / "assets/generated"))
+    print(f"[OK] Images: copied {stats['copied']}, skipped {stats['skipped']}, removed {stats['removed']}")
     print("[OK] Produced/updated GDevelop project:", game_json)
     print("[NEXT] Open in GDevelop:", game_json)
+
+
+def run_pipeline(
+    assets_dir: Path,
+    game_dir: Optional[Path],
+    transfer: str = "copy",
+    tools: bool = False,
+    jobs: Optional[int] = None,
+    force: bool = False,
+    watch_mode: bool = False,
+    polling: bool = False,
+    debounce: float = DEBOUNCE,
+    dry_run: bool = False,
+    split: bool = False,
+) -> None:
+    """
+    tools: run the asset tool steps first. game_dir: copy assets_dir into the game
+    and update game.json. watch_mode: after the first run keep watching the inputs
+    (input/extra_images + _drop_all for tools, assets_dir for the game) and re-run
+    only what the changed files affect. dry_run: print the game.json patch
+    instead of copying images and writing the project. split: store game.json in
+    GDevelop's folderProject layout (one file per layout / external event / layout).
+    """
+    if tools and not _run_tools(jobs, force):
+        if not watch_mode:
+            raise SystemExit("Pipeline stopped: a tool step failed (see above)")
+    if game_dir is not None:
+        _run_game(assets_dir, game_dir, transfer, dry_run, split)
+    if not watch_mode:
+        return
+
+    roots: List[Path] = []
+    if tools:
+        roots += [_EXTRA, _DROP]
+    if game_dir is not None:
+        roots.append(assets_dir)
+
+    def on_change(changed: Set[Path]) -> None:
+        print(f"[i] {len(changed)} changed path(s), rebuilding affected steps")
+        if tools and _touches((_EXTRA, _DROP), tuple(changed)):
+            _run_tools(jobs, False, changed)
+        if game_dir is not None and _touches((assets_dir,), tuple(changed)):
+            _run_game(assets_dir, game_dir, transfer, dry_run, split)
+        print("[i] Watching for changes (Ctrl+C to stop)")
+
+    def own_output(p: Path) -> bool:
+        # ingest writes into _drop_all, which is watched for files dropped there by hand
+        return tools and _touches((_DROP,), (p,))
+
+    print("[i] Watching:", ", ".join(str(r) for r in roots), "(Ctrl+C to stop)")
+    try:
+        watch(roots, on_change, debounce=debounce, polling=polling, own_output=own_output)
+    except KeyboardInterrupt:
+        print("[OK] Watch stopped")
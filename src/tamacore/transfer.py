@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+
+# How image bytes get from a source folder into an output tree.
+#   copy     - plain byte copy (shutil.copy2)
+#   hardlink - second name for the same inode (same filesystem only)
+#   reflink  - copy-on-write clone via the Linux FICLONE ioctl (btrfs, xfs, ...)
+#   symlink  - absolute symlink to the source
+# Every mode falls back to "copy" when the filesystem/OS refuses it.
+TRANSFER_MODES = ("copy", "hardlink", "reflink", "symlink")
+
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from linux/fs.h
+
+# (mode, src device, dst device) combos that already failed once: don't retry them per file.
+_unsupported: set[tuple[str, int, int]] = set()
+
+
+def _devices(src: Path, dst: Path) -> tuple[int, int]:
+    try:
+        return src.stat().st_dev, dst.parent.stat().st_dev
+    except OSError:
+        return -1, -1
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    import fcntl  # not available on Windows -> ImportError -> fallback
+
+    with src.open("rb") as fs, dst.open("wb") as fd:
+        try:
+            fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+        except OSError:
+            fd.close()
+            dst.unlink()
+            raise
+    shutil.copystat(src, dst)
+
+
+def _link(mode: str, src: Path, dst: Path) -> None:
+    if mode == "hardlink":
+        os.link(src, dst)
+    elif mode == "reflink":
+        _reflink(src, dst)
+    elif mode == "symlink":
+        os.symlink(os.path.abspath(src), dst)
+    else:
+        raise ValueError(f"Unknown transfer mode: {mode}")
+
+
+def transfer_file(src: Path, dst: Path, mode: str = "copy") -> str:
+    """
+    Puts src's content at dst using the given mode, replacing dst if present.
+    Returns the mode that was actually used ("copy" after a fallback).
+
+    Note: with "hardlink" src and dst are the same file; editing one edits both.
+    """
+    if mode not in TRANSFER_MODES:
+        raise ValueError(f"Unknown transfer mode: {mode} (expected one of {', '.join(TRANSFER_MODES)})")
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    # Existing dst may be a link to src; copy2 over it would fail (SameFileError) or write through.
+    if dst.is_symlink() or dst.exists():
+        dst.unlink()
+
+    if mode != "copy":
+        key = (mode, *_devices(src, dst))
+        if key not in _unsupported:
+            try:
+                _link(mode, src, dst)
+                return mode
+            except (OSError, ImportError, NotImplementedError):
+                _unsupported.add(key)
+
+    shutil.copy2(src, dst)
+    return "copy"
@@ -1,14 +1,158 @@
 from __future__ import annotations
 
 import json
+import math
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Union
+
+# --- JSON facade -------------------------------------------------------------
+# orjson (dumps + loads) or msgspec (loads) when installed, stdlib otherwise.
+# Picked on first use; TAMACORE_JSON=stdlib|orjson|msgspec forces one.
+# Output is byte-identical to json.dumps(..., ensure_ascii=False, indent=2)
+# (or compact separators): anything orjson would format differently (exponent
+# or non-finite floats, non-str keys, other types) goes through stdlib.
+
+_backend: Optional[Dict[str, Any]] = None
+
+
+def _load_backend() -> Dict[str, Any]:
+    global _backend
+    if _backend is not None:
+        return _backend
+    want = os.environ.get("TAMACORE_JSON", "").lower()
+    backend: Dict[str, Any] = {"name": "stdlib", "orjson": None, "msgspec": None}
+    if want in ("", "orjson"):
+        try:
+            import orjson
+
+            backend.update(name="orjson", orjson=orjson)
+        except ImportError:
+            pass
+    if backend["orjson"] is None and want in ("", "msgspec"):
+        try:
+            import msgspec.json
+
+            backend.update(name="msgspec", msgspec=msgspec.json)
+        except ImportError:
+            pass
+    _backend = backend
+    return backend
+
+
+def json_backend() -> str:
+    return _load_backend()["name"]
+
+
+def _orjson_safe(obj: Any) -> bool:
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        t = type(o)
+        if t is str or t is int or t is bool or o is None:
+            continue
+        if t is float:
+            # stdlib writes 1e+16 / 1e-05 / NaN, orjson 1e16 / 0.00001 / null
+            if not math.isfinite(o) or "e" in repr(o):
+                return False
+        elif t is dict:
+            if any(type(k) is not str for k in o):
+                return False
+            stack.extend(o.values())
+        elif t is list or t is tuple:
+            stack.extend(o)
+        else:
+            return False
+    return True
+
+
+def json_dumps_bytes(obj: Any, compact: bool = False) -> bytes:
+    orjson = _load_backend()["orjson"]
+    if orjson is not None and _orjson_safe(obj):
+        try:
+            return orjson.dumps(obj) if compact else orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        except (TypeError, orjson.JSONEncodeError):
+            pass  # e.g. ints past 64 bits, lone surrogates: stdlib decides
+    if compact:
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(obj, ensure_ascii=False, indent=2)
+    return text.encode("utf-8")
+
+
+def json_dumps(obj: Any, compact: bool = False) -> str:
+    return json_dumps_bytes(obj, compact).decode("utf-8")
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    backend = _load_backend()
+    try:
+        if backend["orjson"] is not None:
+            return backend["orjson"].loads(data)
+        if backend["msgspec"] is not None:
+            return backend["msgspec"].decode(data)
+    except Exception:
+        pass  # NaN/Infinity literals, huge ints...: let stdlib accept or report it
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    return json.loads(data)
 
 
 def read_json(path: Path) -> Dict[str, Any]:
-    return json.loads(path.read_text(encoding="utf-8"))
+    return json_loads(path.read_bytes())
+
+
+def _unchanged(path: Path, payload: bytes) -> bool:
+    try:
+        if path.stat().st_size != len(payload):
+            return False
+        return path.read_bytes() == payload
+    except (FileNotFoundError, IsADirectoryError):
+        return False
 
 
-def write_json(path: Path, data: Dict[str, Any]) -> None:
+@contextmanager
+def atomic_writer(path: Path) -> Iterator[BinaryIO]:
+    """
+    Binary file that replaces path only once the block completes: writes go to a
+    temp file in the same folder, are fsynced and swapped in with os.replace, so a
+    crash or an exception never leaves a truncated file (the old one stays).
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with tmp.open("wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def write_bytes_atomic(path: Path, payload: bytes) -> bool:
+    """
+    Writes payload unless the file already holds exactly these bytes (mtime is then
+    left alone, so GDevelop and the build caches don't see a change). Real writes
+    go through atomic_writer. Returns True if written.
+    """
+    if _unchanged(path, payload):
+        return False
+    with atomic_writer(path) as f:
+        f.write(payload)
+    return True
+
+
+def write_text(path: Path, text: str) -> bool:
+    return write_bytes_atomic(path, text.encode("utf-8"))
+
+
+def write_json(path: Path, data: Dict[str, Any], compact: bool = False) -> bool:
+    """
+    indent=2 for files people open (game.json); compact=True drops the whitespace
+    for machine-only artifacts (mapping.json, catalog.json, caches).
+    """
+    return write_bytes_atomic(path, json_dumps_bytes(data, compact))
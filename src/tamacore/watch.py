@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (+ name)
+
+POLL_INTERVAL = 1.0
+DEBOUNCE = 0.5
+
+
+class InotifyWatcher:
+    """
+    Linux inotify through ctypes (no extra dependencies). Directories are watched
+    recursively; new subdirectories are picked up as they appear.
+    """
+
+    def __init__(self, roots: Iterable[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add.restype = ctypes.c_int
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = [Path(r) for r in roots]
+        self._wds: Dict[int, Path] = {}
+        for root in self.roots:
+            self._watch_tree(root)
+
+    def _watch(self, d: Path) -> None:
+        wd = self._add(self.fd, os.fsencode(d), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {d}")
+        self._wds[wd] = d
+
+    def _watch_tree(self, root: Path) -> None:
+        self._watch(root)
+        for dirpath, dirnames, _ in os.walk(root):
+            for name in dirnames:
+                self._watch(Path(dirpath) / name)
+
+    def poll(self, timeout: Optional[float]) -> Set[Path]:
+        """Changed paths; waits up to timeout seconds (None = until something happens)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed: Set[Path] = set()
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos < len(buf):
+                wd, mask, _cookie, size = _EVENT.unpack_from(buf, pos)
+                name = buf[pos + _EVENT.size:pos + _EVENT.size + size].rstrip(b"\0")
+                pos += _EVENT.size + size
+                if mask & IN_Q_OVERFLOW:
+                    # events were lost: report the roots so everything gets checked
+                    changed.update(self.roots)
+                    continue
+                d = self._wds.get(wd)
+                if d is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._wds[wd]
+                    continue
+                p = d / os.fsdecode(name) if name else d
+                changed.add(p)
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._watch_tree(p)
+                    except OSError:
+                        pass
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback: compares (size, mtime) snapshots of the trees every POLL_INTERVAL."""
+
+    def __init__(self, roots: Iterable[Path], interval: float = POLL_INTERVAL):
+        self.roots = [Path(r) for r in roots]
+        self.interval = interval
+        self._snap = self._snapshot()
+
+    def _snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        snap: Dict[Path, Tuple[int, int]] = {}
+        stack = list(self.roots)
+        while stack:
+            d = stack.pop()
+            try:
+                with os.scandir(d) as it:
+                    for e in it:
+                        if e.is_dir(follow_symlinks=False):
+                            stack.append(Path(e.path))
+                        else:
+                            st = e.stat()
+                            snap[Path(e.path)] = (st.st_size, st.st_mtime_ns)
+            except FileNotFoundError:
+                pass
+        return snap
+
+    def poll(self, timeout: Optional[float]) -> Set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snap = self._snapshot()
+            changed = {p for p in snap.keys() | self._snap.keys() if snap.get(p) != self._snap.get(p)}
+            self._snap = snap
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            wait = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(wait)
+
+    def close(self) -> None:
+        pass
+
+
+def make_watcher(roots: Iterable[Path], polling: bool = False):
+    roots = list(roots)
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as e:
+            print(f"[i] inotify unavailable ({e}), polling every {POLL_INTERVAL:g}s")
+    return PollingWatcher(roots)
+
+
+def watch(
+    roots: List[Path],
+    on_change: Callable[[Set[Path]], None],
+    debounce: float = DEBOUNCE,
+    polling: bool = False,
+    own_output: Optional[Callable[[Path], bool]] = None,
+) -> None:
+    """
+    Calls on_change(changed paths) after every burst of changes under roots
+    (a burst ends once nothing has changed for `debounce` seconds). Runs until Ctrl+C.
+    own_output(path) -> True for paths on_change itself writes under the roots:
+    such changes made while on_change runs are dropped instead of starting
+    another rebuild.
+    """
+    for r in roots:
+        r.mkdir(parents=True, exist_ok=True)
+    watcher = make_watcher(roots, polling)
+    pending: Set[Path] = set()
+    try:
+        while True:
+            changed = pending or watcher.poll(None)
+            while True:
+                more = watcher.poll(debounce)
+                if not more:
+                    break
+                changed |= more
+            on_change(changed)
+            pending = watcher.poll(0)
+            if own_output is not None:
+                pending = {p for p in pending if not own_output(p)}
+    finally:
+        watcher.close()
@@ -1,15 +1,16 @@
 from pathlib import Path
 from datetime import datetime
-import json
+import argparse
 import shutil
 
-try:
-    from PIL import Image
-except Exception:
-    Image = None
+from src.tamacore.hash_cache import DEFAULT_CACHE_PATH, HashCache
+from src.tamacore.utils import read_json, write_json
+from tools.file_index import FileEntry, FileIndex, shared_index
+from tools.image_header import read_image_size
 
 DROP = Path("output") / "assets_raw" / "_drop_all"
 OUT_ROOT = Path("output") / "assets_raw"
+MAPPING_JSON = OUT_ROOT / "mapping.json"
 
 CATS = {
     "ui": OUT_ROOT / "ui",
@@ -25,11 +26,10 @@ def ensure_dirs():
         d.mkdir(parents=True, exist_ok=True)
 
 def img_meta(path: Path):
-    if Image is None:
-        return {"w": None, "h": None, "mode": None}
+    # header-only read, no Pillow needed
     try:
-        with Image.open(path) as im:
-            return {"w": im.size[0], "h": im.size[1], "mode": im.mode}
+        w, h, mode = read_image_size(path)
+        return {"w": w, "h": h, "mode": mode}
     except Exception as e:
         return {"w": None, "h": None, "mode": None, "error": str(e)}
 
@@ -49,28 +49,58 @@ def guess_category(name_lower: str) -> str:
 
     return "_unmapped"
 
-def copy_file(src: Path, dest_dir: Path) -> Path:
+def copy_file(src: Path, dest_dir: Path, index: FileIndex | None = None) -> Path:
+    index = index or shared_index()
     dest = dest_dir / src.name
-    if dest.exists():
+    if index.exists(dest):
         i = 2
         while True:
             cand = dest_dir / f"{src.stem}_{i}{src.suffix}"
-            if not cand.exists():
+            if not index.exists(cand):
                 dest = cand
                 break
             i += 1
     shutil.copy2(src, dest)
+    index.added(dest)
     return dest
 
-def main():
-    ensure_dirs()
+def load_previous_items():
+    """filename -> mapping item of the last scan (only items that recorded size/mtime)."""
+    if not MAPPING_JSON.exists():
+        return {}
+    try:
+        items = read_json(MAPPING_JSON).get("items", [])
+    except Exception:
+        return {}
+    return {it["filename"]: it for it in items if "size" in it and "mtime_ns" in it}
+
+def still_copied(entry: FileEntry, category: str, cache: HashCache, index: FileIndex | None = None) -> bool:
+    """
+    True if the category folder still holds a copy of this drop file. Copies keep
+    size and mtime (copy2, and naming_pro only renames); if dedupe kept another
+    file with the same content instead, the digests match.
+    """
+    index = index or shared_index()
+    same_size = [c for c in index.files(CATS[category]) if c.size == entry.size]
+    if any(c.mtime_ns == entry.mtime_ns for c in same_size):
+        return True
+    if not same_size:
+        return False
+    digest = cache.digest(entry.path)
+    return any(cache.digest(c.path) == digest for c in same_size)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--force", action="store_true", help="Copy every _drop_all file again, ignore mapping.json")
+    args = ap.parse_args(argv)
 
-    if not DROP.exists():
-        raise SystemExit(f"_drop_all missing: {DROP}")
+    ensure_dirs()
 
-    files = [p for p in DROP.iterdir() if p.is_file()]
-    if not files:
-        raise SystemExit(f"_drop_all on tyhjä: {DROP}")
+    # nothing dropped yet (fresh checkout): nothing to map, not an error
+    entries = shared_index().files(DROP)
+    if not entries:
+        print(f"[i] _drop_all on tyhjä, ei kartoitettavaa: {DROP}")
+        return
 
     mapping = {
         "generated_at": datetime.utcnow().isoformat() + "Z",
@@ -78,24 +108,45 @@ def main():
         "items": [],
     }
 
-    for f in sorted(files):
-        cat = guess_category(f.name.lower())
-        out_path = copy_file(f, CATS[cat])
-        meta = img_meta(f)
-
-        mapping["summary"][cat] += 1
-        mapping["items"].append({
-            "filename": f.name,
-            "category": cat,
-            "copied_to": str(out_path).replace("\\", "/"),
-            "meta": meta,
-        })
-
-    out_json = OUT_ROOT / "mapping.json"
-    out_json.write_text(json.dumps(mapping, indent=2), encoding="utf-8")
+    # drop files already mapped (same size + mtime) whose copy is still in place are not copied again
+    previous = {} if args.force else load_previous_items()
+    reused = 0
+    with HashCache(DEFAULT_CACHE_PATH) as cache:
+        for e in entries:
+            f = e.path
+            prev = previous.get(f.name)
+            if (
+                prev
+                and prev["size"] == e.size
+                and prev["mtime_ns"] == e.mtime_ns
+                and prev["category"] in CATS
+                and still_copied(e, prev["category"], cache)
+            ):
+                mapping["summary"][prev["category"]] += 1
+                mapping["items"].append(prev)
+                reused += 1
+                continue
+
+            cat = guess_category(f.name.lower())
+            out_path = copy_file(f, CATS[cat])
+            meta = img_meta(f)
+
+            mapping["summary"][cat] += 1
+            mapping["items"].append({
+                "filename": f.name,
+                "category": cat,
+                "copied_to": str(out_path).replace("\\", "/"),
+                "meta": meta,
+                "size": e.size,
+                "mtime_ns": e.mtime_ns,
+            })
+
+    out_json = MAPPING_JSON
+    write_json(out_json, mapping, compact=True)
 
     print("[✓] Asset scan complete")
     print(mapping["summary"])
+    print(f"[i] Mapped {len(entries) - reused} new/changed files, {reused} unchanged")
     print("[✓] Wrote:", out_json)
 
 if __name__ == "__main__":
@@ -1,6 +1,25 @@
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+import argparse
+import hashlib
 import json
-from PIL import Image
+import multiprocessing
+import os
+import struct
+import zlib
+
+from src.tamacore.hash_cache import DEFAULT_CACHE_PATH, HashCache, sha256_file
+from src.tamacore.utils import atomic_writer, read_json, write_json
+from tools.file_index import IMG_EXTS, shared_index
+from tools.image_header import read_image_size
+from tools.png_codec import PngWriter, RGBAImage, iter_png_rows, read_png
+
+# Optional: faster decoding and JPEG/WebP input. Without it only PNG sources are packed.
+try:
+    from PIL import Image
+except Exception:
+    Image = None
 
 SRC_DIRS = [
     Path("output/assets_raw/ui"),
@@ -13,24 +32,19 @@ SRC_DIRS = [
 OUT_DIR = Path("output/atlas")
 OUT_PNG = OUT_DIR / "atlas.png"
 OUT_JSON = OUT_DIR / "atlas.json"
+CACHE_JSON = OUT_DIR / ".atlas_cache.json"  # fingerprint + layout of the last build
+CACHE_VERSION = 2
 
 PADDING = 4
 MAX_ATLAS_W = 2048  # jos tulee liikaa, nosta 4096:een
+MAX_ATLAS_H = 4096  # per page; more sprites spill into atlas_1.png, atlas_2.png, ...
+PACKER = "maxrects"  # shelf | maxrects | skyline
+BAND_HEIGHT = 256  # atlas rows composed (and held in memory) at a time
+PNG_LEVEL = 6  # zlib level for the atlas pages (0-9)
 
 def collect_images():
-    items = []
-    for d in SRC_DIRS:
-        if not d.exists():
-            continue
-        for p in sorted(d.glob("*.png")):
-            items.append(p)
-        for p in sorted(d.glob("*.webp")):
-            items.append(p)
-        for p in sorted(d.glob("*.jpg")):
-            items.append(p)
-        for p in sorted(d.glob("*.jpeg")):
-            items.append(p)
-    return items
+    index = shared_index()
+    return [e.path for d in SRC_DIRS for e in index.files(d, IMG_EXTS)]
 
 def shelf_pack(sizes, max_w):
     x = PADDING
@@ -58,57 +72,626 @@ def shelf_pack(sizes, max_w):
     atlas_h = max(256, ((used_h + 31) // 32) * 32)
     return placements, atlas_w, atlas_h
 
-def main():
+def _atlas_size(placements, sizes, max_w, max_h=None):
+    used_w = used_h = 0
+    for pl, (w, h) in zip(placements, sizes):
+        if pl is None:
+            continue
+        x, y, rot = pl
+        if rot:
+            w, h = h, w
+        used_w = max(used_w, x + w + PADDING)
+        used_h = max(used_h, y + h + PADDING)
+    atlas_w = min(max_w, max(256, ((used_w + 31) // 32) * 32))
+    atlas_h = max(256, ((used_h + 31) // 32) * 32)
+    if max_h is not None:
+        atlas_h = min(max_h, atlas_h)
+    return atlas_w, atlas_h
+
+def _check_fits(sizes, max_w, max_h, rotate):
+    lw = max_w - 2 * PADDING
+    lh = (max_h - 2 * PADDING) if max_h else None
+    for (w, h) in sizes:
+        ok = w <= lw and (lh is None or h <= lh)
+        if not ok and rotate:
+            ok = h <= lw and (lh is None or w <= lh)
+        if not ok:
+            raise ValueError(f"Sprite {w}x{h} does not fit in a {max_w}x{max_h or '∞'} atlas page")
+
+def _maxrects_fit(sizes, max_w, bin_h, rotate, skip=False):
+    """
+    One MaxRects (best-short-side-fit) run in a max_w x bin_h bin.
+    Sprites that don't fit make it return None, or get a None placement with skip=True.
+    """
+    free = [(PADDING, PADDING, max_w - PADDING, bin_h - PADDING)]  # (x, y, w, h)
+    placements = []
+
+    for (w, h) in sizes:
+        options = [(w, h, False)]
+        if rotate and w != h:
+            options.append((h, w, True))
+
+        best = None
+        for fx, fy, fw, fh in free:
+            for ow, oh, rot in options:
+                rw, rh = ow + PADDING, oh + PADDING
+                if rw > fw or rh > fh:
+                    continue
+                lw, lh = fw - rw, fh - rh
+                score = (min(lw, lh), max(lw, lh), fy, fx)
+                if best is None or score < best[0]:
+                    best = (score, fx, fy, rw, rh, rot)
+        if best is None:
+            if not skip:
+                return None
+            placements.append(None)
+            continue
+
+        _, px, py, rw, rh, rot = best
+        placements.append((px, py, rot))
+        free = _split_free(free, px, py, rw, rh)
+
+    return placements
+
+def _placed_area(placements, sizes):
+    return sum(w * h for pl, (w, h) in zip(placements, sizes) if pl is not None)
+
+def maxrects_pack(sizes, max_w, rotate=False, max_h=None):
+    """
+    MaxRects, best-short-side-fit. Every sprite is reserved as (w+PADDING, h+PADDING)
+    inside a bin that starts at (PADDING, PADDING), so gaps match shelf_pack.
+    BSSF needs a bounded bin, so the atlas height is binary-searched between the
+    area lower bound and a height that is known to fit.
+    With max_h, sprites that don't fit on this page get a None placement.
+    Returns (placements [(x, y, rotated) | None], atlas_w, atlas_h).
+    """
+    _check_fits(sizes, max_w, max_h, rotate)
+    if not sizes:
+        return [], *_atlas_size([], [], max_w)
+
+    # skyline is quick and gives a good upper bound
+    best, _, hi = skyline_pack(sizes, max_w, rotate, max_h)
+    if None in best:
+        # page is full either way: keep whichever packer got more pixels onto it
+        fit = _maxrects_fit(sizes, max_w, max_h, rotate, skip=True)
+        if _placed_area(fit, sizes) >= _placed_area(best, sizes):
+            best = fit
+        return best, *_atlas_size(best, sizes, max_w, max_h)
+
+    area = sum((w + PADDING) * (h + PADDING) for w, h in sizes)
+    lo = max(max(min(w, h) if rotate else h for w, h in sizes), area // (max_w - PADDING))
+    while hi - lo > 32:
+        mid = (lo + hi) // 2
+        fit = _maxrects_fit(sizes, max_w, mid + PADDING, rotate)
+        if fit is None:
+            lo = mid
+        else:
+            best, hi = fit, mid
+
+    atlas_w, atlas_h = _atlas_size(best, sizes, max_w, max_h)
+    return best, atlas_w, atlas_h
+
+def _split_free(free, px, py, pw, ph):
+    kept = []
+    added = []
+    for r in free:
+        fx, fy, fw, fh = r
+        if px >= fx + fw or px + pw <= fx or py >= fy + fh or py + ph <= fy:
+            kept.append(r)
+            continue
+        # maximal leftovers on each side of the used rect
+        if px > fx:
+            added.append((fx, fy, px - fx, fh))
+        if px + pw < fx + fw:
+            added.append((px + pw, fy, fx + fw - px - pw, fh))
+        if py > fy:
+            added.append((fx, fy, fw, py - fy))
+        if py + ph < fy + fh:
+            added.append((fx, py + ph, fw, fy + fh - py - ph))
+
+    def inside(a, b):
+        return a[0] >= b[0] and a[1] >= b[1] and a[0] + a[2] <= b[0] + b[2] and a[1] + a[3] <= b[1] + b[3]
+
+    # only new rects can be redundant (old ones were already pruned against each other)
+    out = list(kept)
+    for i, a in enumerate(added):
+        if any(inside(a, b) for b in kept):
+            continue
+        if any(j != i and inside(a, b) and (a != b or j < i) for j, b in enumerate(added)):
+            continue
+        out.append(a)
+    return out
+
+def skyline_pack(sizes, max_w, rotate=False, max_h=None):
+    """
+    Skyline, bottom-left: each sprite goes where its top edge ends lowest.
+    With max_h, sprites that don't fit on this page get a None placement.
+    Returns (placements [(x, y, rotated) | None], atlas_w, atlas_h).
+    """
+    _check_fits(sizes, max_w, max_h, rotate)
+    right = max_w  # sprite + trailing PADDING must end at or before this
+    skyline = [[PADDING, PADDING, right - PADDING]]  # [x, y, width]
+    placements = []
+
+    for (w, h) in sizes:
+        options = [(w, h, False)]
+        if rotate and w != h:
+            options.append((h, w, True))
+
+        best = None
+        for ow, oh, rot in options:
+            rw, rh = ow + PADDING, oh + PADDING
+            for i, (sx, _, _) in enumerate(skyline):
+                if sx + rw > right:
+                    break
+                # y = highest segment under [sx, sx+rw)
+                y = 0
+                covered = 0
+                j = i
+                while covered < rw:
+                    y = max(y, skyline[j][1])
+                    covered += skyline[j][2]
+                    j += 1
+                if max_h is not None and y + rh > max_h:
+                    continue
+                score = (y + rh, sx)
+                if best is None or score < best[0]:
+                    best = (score, i, sx, y, rw, rh, rot)
+        if best is None:
+            placements.append(None)
+            continue
+
+        _, i, px, py, rw, rh, rot = best
+        placements.append((px, py, rot))
+
+        # replace covered segments by the new one, keep the uncovered tail
+        end = px + rw
+        new = [px, py + rh, rw]
+        j = i
+        while j < len(skyline) and skyline[j][0] < end:
+            seg_end = skyline[j][0] + skyline[j][2]
+            if seg_end > end:
+                skyline[j] = [end, skyline[j][1], seg_end - end]
+                break
+            skyline.pop(j)
+        skyline.insert(i, new)
+
+        # merge neighbours at the same height
+        merged = [skyline[0]]
+        for seg in skyline[1:]:
+            if seg[1] == merged[-1][1]:
+                merged[-1][2] += seg[2]
+            else:
+                merged.append(seg)
+        skyline = merged
+
+    atlas_w, atlas_h = _atlas_size(placements, sizes, max_w, max_h)
+    return placements, atlas_w, atlas_h
+
+def _shelf(sizes, max_w, rotate=False, max_h=None):
+    _check_fits(sizes, max_w, max_h, False)
+    placements, _, _ = shelf_pack(sizes, max_w)
+    out = []
+    for (x, y), (w, h) in zip(placements, sizes):
+        # shelves past the page bottom move to the next page
+        out.append(None if max_h is not None and y + h + PADDING > max_h else (x, y, False))
+    return out, *_atlas_size(out, sizes, max_w, max_h)
+
+PACKERS = {
+    "shelf": _shelf,
+    "maxrects": maxrects_pack,
+    "skyline": skyline_pack,
+}
+
+def pack_pages(sizes, packer, rotate, max_w, max_h):
+    """
+    Packs sizes onto as many max_w x max_h pages as needed.
+    Returns [{"items": [(index, x, y, rotated)], "w": atlas_w, "h": atlas_h}].
+    """
+    pages = []
+    remaining = list(range(len(sizes)))
+    while remaining:
+        sub = [sizes[i] for i in remaining]
+        placements, atlas_w, atlas_h = PACKERS[packer](sub, max_w, rotate, max_h)
+        items = [(i, *pl) for i, pl in zip(remaining, placements) if pl is not None]
+        if not items:
+            raise ValueError("Packer could not place any sprite on an empty page")
+        pages.append({"items": items, "w": atlas_w, "h": atlas_h})
+        remaining = [i for i, pl in zip(remaining, placements) if pl is None]
+    return pages
+
+def _frame_entry(x, y, w, h, rot, ox, oy, src_w, src_h):
+    return {
+        "frame": {"x": x, "y": y, "w": w, "h": h},
+        "rotated": rot,
+        "trimmed": (w, h) != (src_w, src_h),
+        "spriteSourceSize": {"x": ox, "y": oy, "w": w, "h": h},
+        "sourceSize": {"w": src_w, "h": src_h},
+    }
+
+def load_rgba(p):
+    if Image is not None:
+        with Image.open(p) as im:
+            im = im.convert("RGBA")
+            return RGBAImage(im.size[0], im.size[1], bytearray(im.tobytes()))
+    if p.suffix.lower() != ".png":
+        raise ValueError("Pillow not installed; only PNG can be decoded without it")
+    return read_png(p)
+
+def trim_box(im):
+    """Bounding box of non-transparent pixels; fully transparent sprites keep a 1x1 corner."""
+    return im.alpha_bbox() or (0, 0, 1, 1)
+
+def _scan_one(p, trim, group, stream, digest=None):
+    """
+    Decodes, trims and hashes one sprite: (key, box, source w, source h, image or None).
+    digest: the file's sha256 from the HashCache (stream without trim keys on it).
+    Runs in worker processes with --jobs, so errors come back as a message string.
+    """
+    try:
+        if stream and not trim:
+            if Image is None and p.suffix.lower() != ".png":
+                raise ValueError("Pillow not installed; only PNG can be decoded without it")
+            src_w, src_h, _ = read_image_size(p)
+            # no pixels yet: identical files stand in for identical frames
+            key = (group, (src_w, src_h), "file:" + (digest or sha256_file(p)))
+            return key, (0, 0, src_w, src_h), src_w, src_h, None
+        im = load_rgba(p)
+        src_w, src_h = im.size
+        box = trim_box(im) if trim else (0, 0, src_w, src_h)
+        if box != (0, 0, src_w, src_h):
+            im = im.crop(box)
+        key = (group, im.size, hashlib.sha1(im.pixels).hexdigest())
+        # stream mode re-decodes at composition time; don't ship pixels back
+        return key, box, src_w, src_h, None if stream else im
+    except (ValueError, OSError, EOFError, struct.error, zlib.error) as e:
+        # unsupported, truncated or corrupt file (Pillow's UnidentifiedImageError is an OSError)
+        return str(e) if isinstance(e, ValueError) else f"unreadable image ({e or type(e).__name__})"
+
+def scan_sprites(paths, trim, group_by_category, stream, known=None, jobs=1, digests=None):
+    """
+    Returns (sprites, uniques, source_area).
+      sprites: [(frame name, key, offset x, offset y, source w, source h, path)]
+      uniques: key -> trimmed RGBAImage, or (path, trim box) when stream=True
+    Pixel-identical trimmed frames share a key (one atlas rect).
+    stream=True keeps no pixels: with trim each sprite is decoded once here for its
+    box/hash and again when composed; without trim only the header is read.
+    known: posix path -> (key, box, source w, source h) from the build cache;
+    those sprites are not decoded here at all.
+    digests: posix path -> sha256 already known (HashCache), reused as the alias
+    key in stream mode without trim instead of reading the file again.
+    jobs > 1 decodes in a process pool (decoding is CPU-bound Python / Pillow work).
+    The pool uses "spawn": the pipeline runner calls main() from a worker thread,
+    and forking a process that has threads is unsafe.
+    """
+    known = known or {}
+    digests = digests or {}
+    todo = [p for p in paths if p.as_posix() not in known]
+    groups = [p.parent.name if group_by_category else None for p in todo]
+    sums = [digests.get(p.as_posix()) for p in todo]
+    if jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = pool.map(
+                _scan_one, todo,
+                [trim] * len(todo), groups, [stream] * len(todo), sums,
+                chunksize=max(1, len(todo) // (jobs * 4)),
+            )
+            scanned = dict(zip(todo, results))
+    else:
+        scanned = {p: _scan_one(p, trim, g, stream, d) for p, g, d in zip(todo, groups, sums)}
+
+    sprites = []
+    uniques = {}
+    source_area = 0
+    for p in paths:
+        if p.as_posix() in known:
+            key, box, src_w, src_h = known[p.as_posix()]
+            im = None
+        else:
+            res = scanned[p]
+            if isinstance(res, str):
+                print(f"[!] Skipping {p}: {res}")
+                continue
+            key, box, src_w, src_h, im = res
+        source_area += src_w * src_h
+        if key not in uniques:
+            uniques[key] = (p, box) if stream or im is None else im
+        sprites.append((f"{p.stem}.png", key, box[0], box[1], src_w, src_h, p))
+    return sprites, uniques, source_area
+
+def _sprite_image(entry):
+    if isinstance(entry, RGBAImage):
+        return entry
+    p, box = entry
+    im = load_rgba(p)
+    return im.crop(box) if box != (0, 0, im.width, im.height) else im
+
+class BasePageError(Exception):
+    """The previous page PNG could not be read back (truncated, corrupt)."""
+
+def _base_rows(f):
+    try:
+        yield from iter_png_rows(f)
+    except (ValueError, zlib.error) as e:
+        raise BasePageError(str(e)) from e
+    raise BasePageError("page has fewer rows than expected")
+
+def write_page(out_png, page, uniques, band_h=BAND_HEIGHT, base=None, clear=(), items=None,
+               level=PNG_LEVEL, jobs=1):
+    """
+    Composes the page band by band and streams the rows into the PNG.
+    Only one band plus the sprites overlapping it are held at any time
+    (sprites in stream mode are decoded when the first band reaches them).
+    base/clear/items: start from the rows of a previous page PNG (read band by
+    band too), blank the clear rects (x, y, w, h) and draw only these items;
+    raises BasePageError if base can't be decoded.
+    The page goes to a temp file that replaces out_png only when complete, so an
+    interrupted run leaves the old page intact (base may be out_png itself).
+    jobs > 1 deflates row blocks on that many threads (see PngWriter).
+    """
+    width, height = page["w"], page["h"]
+    stride = width * 4
+    items = sorted(page["items"] if items is None else items, key=lambda it: it[2])
+    nxt = 0
+    live = []  # (image as placed, x, y)
+    # base is closed before the temp file replaces out_png (Windows can't replace an open file)
+    with atomic_writer(out_png) as f, (base.open("rb") if base is not None else nullcontext()) as src:
+        rows = _base_rows(src) if src is not None else None
+        writer = PngWriter(f, width, height, level, jobs)
+        for top in range(0, height, band_h):
+            bottom = min(height, top + band_h)
+            while nxt < len(items) and items[nxt][2] < bottom:
+                key, x, y, rot = items[nxt]
+                im = _sprite_image(uniques[key])
+                # rotated frames are stored 90° clockwise; frame w/h stay the sprite's own size
+                live.append((im.rotate_cw() if rot else im, x, y))
+                nxt += 1
+
+            if rows is None:
+                band = bytearray(stride * (bottom - top))
+            else:
+                band = bytearray()
+                for _ in range(bottom - top):
+                    band += next(rows)
+                for x, y, w, h in clear:
+                    for r in range(max(y, top), min(y + h, bottom)):
+                        off = (r - top) * stride + x * 4
+                        band[off:off + w * 4] = bytes(w * 4)
+            for im, x, y in live:
+                row_len = im.width * 4
+                for r in range(max(y, top), min(y + im.height, bottom)):
+                    off = (r - top) * stride + x * 4
+                    band[off:off + row_len] = im.pixels[(r - y) * row_len:(r - y + 1) * row_len]
+            view = memoryview(band)
+            for r in range(bottom - top):
+                writer.write_row(view[r * stride:(r + 1) * stride])
+
+            live = [t for t in live if t[2] + t[0].height > bottom]
+        writer.close()
+
+def _key_json(key):
+    group, (w, h), digest = key
+    return [group, w, h, digest]
+
+def _key_from_json(k):
+    return (k[0], (k[1], k[2]), k[3])
+
+def build_options(args):
+    # everything besides the sources that changes the output
+    return {
+        "version": CACHE_VERSION,
+        "padding": PADDING,
+        "max_w": args.max_w,
+        "max_h": args.max_h,
+        "packer": args.packer,
+        "rotate": args.rotate,
+        "trim": args.trim,
+        "group_by_category": args.group_by_category,
+        "stream": args.stream,
+        "level": args.level,
+    }
+
+def fingerprint(options, digests):
+    payload = json.dumps([options, sorted(digests.items())], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def load_build_cache():
+    try:
+        data = read_json(CACHE_JSON)
+        return data if data.get("options", {}).get("version") == CACHE_VERSION else None
+    except Exception:
+        return None
+
+def update_page(out_png, page, uniques, old_page, band_h=BAND_HEIGHT, level=PNG_LEVEL, jobs=1):
+    """
+    Recomposites only what moved or changed since old_page (same image name and size),
+    streaming the old page band by band. If it can't be decoded the page is redrawn.
+    Returns the number of rects drawn; 0 means the file was left untouched.
+    """
+    new_items = set(page["items"])
+    old_items = {(_key_from_json(k), x, y, rot) for (k, x, y, rot) in old_page["items"]}
+    if new_items == old_items:
+        return 0
+
+    clear = []
+    for (key, x, y, rot) in old_items - new_items:
+        w, h = key[1]
+        clear.append((x, y, h, w) if rot else (x, y, w, h))
+    draw = [it for it in page["items"] if it not in old_items]
+    try:
+        write_page(out_png, page, uniques, band_h, base=out_png, clear=clear, items=draw, level=level, jobs=jobs)
+    except BasePageError as e:
+        print(f"[!] {out_png.name} unreadable ({e}), redrawing the whole page")
+        write_page(out_png, page, uniques, band_h, level=level, jobs=jobs)
+        return len(page["items"])
+    return len(draw)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--packer", choices=sorted(PACKERS), default=PACKER)
+    ap.add_argument("--rotate", action="store_true", help="Allow 90° rotation (maxrects/skyline)")
+    ap.add_argument("--max-w", type=int, default=MAX_ATLAS_W, help="Page width limit")
+    ap.add_argument("--max-h", type=int, default=MAX_ATLAS_H, help="Page height limit")
+    ap.add_argument("--group-by-category", action="store_true",
+                    help="Separate pages per source folder (ui, pet, effects...)")
+    ap.add_argument("--no-trim", dest="trim", action="store_false",
+                    help="Keep transparent borders (frames packed at full size)")
+    ap.add_argument("--stream", action="store_true",
+                    help="Bounded memory: keep no sprite pixels between packing and composition")
+    ap.add_argument("--band-height", type=int, default=BAND_HEIGHT, help="Atlas rows composed at a time")
+    ap.add_argument("--force", action="store_true", help=f"Ignore {CACHE_JSON.name}, rebuild everything")
+    ap.add_argument("--jobs", type=int, default=1,
+                    help="Decode processes (default 1 = decode in this process)")
+    ap.add_argument("--threads", type=int, default=os.cpu_count() or 1,
+                    help="PNG compression threads (default: CPU count)")
+    ap.add_argument("--level", type=int, choices=range(10), default=PNG_LEVEL, metavar="0-9",
+                    help=f"PNG compression level (default {PNG_LEVEL})")
+    args = ap.parse_args(argv)
+
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
     paths = collect_images()
     if not paths:
         raise SystemExit("Ei kuvia atlasointiin. Aja ensin: extract -> scan_and_map")
 
-    # load & normalize to RGBA
-    loaded = []
-    for p in paths:
-        im = Image.open(p).convert("RGBA")
-        loaded.append((p, im))
+    # content-addressed build cache: same sources + same options -> nothing to do
+    options = build_options(args)
+    with HashCache(DEFAULT_CACHE_PATH) as hc:
+        digests = {p.as_posix(): hc.digest(p) for p in paths}
+    fp = fingerprint(options, digests)
+    cache = None if args.force else load_build_cache()
+    if cache and cache.get("options") != options:
+        cache = None
+    if cache and cache.get("fingerprint") == fp and OUT_JSON.exists() and all(
+        (OUT_DIR / pg["image"]).exists() for pg in cache.get("pages", [])
+    ):
+        print("[✓] Atlas up to date (inputs unchanged):", OUT_JSON)
+        return
+
+    # sprites whose content didn't change reuse their trim box / key without decoding
+    known = {}
+    if cache:
+        for path, info in cache.get("sources", {}).items():
+            if digests.get(path) == info.get("sha256"):
+                known[path] = (_key_from_json(info["key"]), tuple(info["box"]), *info["size"])
+
+    # normalize to RGBA, trim transparent borders, alias pixel-identical frames
+    sprites, uniques, source_area = scan_sprites(
+        paths, args.trim, args.group_by_category, args.stream, known, args.jobs, digests
+    )
+
+    if not sprites:
+        raise SystemExit("Ei purettavia kuvia atlasointiin (asenna Pillow JPEG/WebP-lähteille)")
+
+    by_key = {}
+    for sp in sprites:
+        by_key.setdefault(sp[1], []).append(sp)
 
     # sort big first helps packing
-    loaded.sort(key=lambda t: (t[1].size[1] * t[1].size[0]), reverse=True)
+    keys = sorted(uniques, key=lambda k: k[1][0] * k[1][1], reverse=True)
+
+    groups = {}
+    for k in keys:
+        groups.setdefault(k[0], []).append(k)
 
-    sizes = [im.size for _, im in loaded]
-    placements, atlas_w, atlas_h = shelf_pack(sizes, MAX_ATLAS_W)
+    pages = []
+    try:
+        for category, gkeys in groups.items():
+            sizes = [k[1] for k in gkeys]
+            for page in pack_pages(sizes, args.packer, args.rotate, args.max_w, args.max_h):
+                page["items"] = [(gkeys[i], x, y, rot) for (i, x, y, rot) in page["items"]]
+                page["category"] = category
+                pages.append(page)
+    except ValueError as e:
+        raise SystemExit(f"{e} (raise MAX_ATLAS_W / MAX_ATLAS_H)")
 
-    atlas = Image.new("RGBA", (atlas_w, atlas_h), (0, 0, 0, 0))
+    multi = len(pages) > 1
+    used_area = sum(w * h for (_, (w, h), _) in keys)
+    efficiency = used_area / float(sum(pg["w"] * pg["h"] for pg in pages))
 
+    old_pages = {pg["image"]: pg for pg in cache.get("pages", [])} if cache else {}
+    written = []
+    textures = []
     frames = {}
-    for (p, im), (x, y) in zip(loaded, placements):
-        atlas.alpha_composite(im, (x, y))
-        name = p.stem  # frame-name
-        frames[f"{name}.png"] = {
-            "frame": {"x": x, "y": y, "w": im.size[0], "h": im.size[1]},
-            "rotated": False,
-            "trimmed": False,
-            "spriteSourceSize": {"x": 0, "y": 0, "w": im.size[0], "h": im.size[1]},
-            "sourceSize": {"w": im.size[0], "h": im.size[1]},
-        }
+    drawn = 0
+    for n, page in enumerate(pages):
+        out_png = OUT_DIR / f"atlas_{n}.png" if multi else OUT_PNG
+        old = old_pages.get(out_png.name)
+        if old and (old["w"], old["h"]) == (page["w"], page["h"]) and out_png.exists():
+            drawn += update_page(out_png, page, uniques, old, args.band_height, args.level, args.threads)
+        else:
+            write_page(out_png, page, uniques, args.band_height, level=args.level, jobs=args.threads)
+            drawn += len(page["items"])
 
-    atlas.save(OUT_PNG)
+        page_frames = {}
+        for (key, x, y, rot) in page["items"]:
+            w, h = key[1]
+            for (name, _, ox, oy, src_w, src_h, _) in by_key[key]:
+                page_frames[name] = _frame_entry(x, y, w, h, rot, ox, oy, src_w, src_h)
+        written.append(out_png)
+        frames.update(page_frames)
 
-    data = {
-        "frames": frames,
-        "meta": {
-            "app": "tamacore-bot",
-            "version": "1.0",
-            "image": OUT_PNG.name,
-            "size": {"w": atlas_w, "h": atlas_h},
-            "scale": "1",
+        texture = {
+            "image": out_png.name,
+            "format": "RGBA8888",
+            "size": {"w": page["w"], "h": page["h"]},
+            "scale": 1,
+            "frames": [dict(filename=k, **v) for k, v in page_frames.items()],
         }
-    }
-    OUT_JSON.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        if page["category"] is not None:
+            texture["category"] = page["category"]
+        textures.append(texture)
+
+    # drop pages left over from a bigger previous build
+    for old in OUT_DIR.glob("atlas*.png"):
+        if old not in written:
+            old.unlink()
+
+    meta = {"app": "tamacore-bot", "version": "1.0"}
+    if not multi:
+        meta["image"] = OUT_PNG.name
+        meta["size"] = {"w": pages[0]["w"], "h": pages[0]["h"]}
+    meta.update({"scale": "1", "packer": args.packer, "efficiency": round(efficiency, 4)})
+
+    if multi:
+        # TexturePacker "multipack" layout: one entry per page
+        data = {"textures": textures, "meta": meta}
+    else:
+        data = {"frames": frames, "meta": meta}
+    write_json(OUT_JSON, data)
+
+    write_json(CACHE_JSON, {
+        "fingerprint": fp,
+        "options": options,
+        "sources": {
+            path.as_posix(): {
+                "sha256": digests[path.as_posix()],
+                "key": _key_json(key),
+                "box": [ox, oy, ox + key[1][0], oy + key[1][1]],
+                "size": [src_w, src_h],
+            }
+            for (_, key, ox, oy, src_w, src_h, path) in sprites
+        },
+        "pages": [
+            {
+                "image": out_png.name,
+                "w": page["w"],
+                "h": page["h"],
+                "items": [[_key_json(k), x, y, rot] for (k, x, y, rot) in page["items"]],
+            }
+            for out_png, page in zip(written, pages)
+        ],
+    }, compact=True)
 
     print("[✓] Atlas ready:")
-    print("   ", OUT_PNG)
+    for out_png in written:
+        print("   ", out_png)
     print("   ", OUT_JSON)
-    print(f"[i] Frames: {len(frames)}")
+    print(f"[i] Frames: {len(frames)} ({len(frames) - len(uniques)} aliased), pages: {len(pages)}")
+    print(f"[i] Pixels packed: {used_area} of {source_area} source ({1 - used_area / float(source_area):.1%} trimmed/aliased)")
+    print(f"[i] Packer: {args.packer}, efficiency {efficiency:.1%}")
+    rescanned = sum(1 for p in paths if p.as_posix() not in known)
+    print(f"[i] Rects composited: {drawn} of {len(uniques)}, sources rescanned: {rescanned} of {len(paths)}")
 
 if __name__ == "__main__":
     main()
@@ -38,6 +38,9 @@ DEFAULT_VERSION = 1
 
 CATEGORY_ORDER = ["ui", "cosmetics", "effects", "backgrounds", "pet", "_unmapped"]
 
+# --- File transfer (copy | hardlink | reflink | symlink; unsupported modes fall back to copy) ---
+TRANSFER_MODE = "copy"
+
 # --- Soft validation rules ---
 ALLOWED_EXT = {".png", ".webp", ".jpg", ".jpeg"}
 MAX_FILE_MB = 15
@@ -1,44 +1,116 @@
 from __future__ import annotations
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import argparse
 import hashlib
+import os
 
-from tools.config import PATHS, CATEGORY_ORDER
+from src.tamacore.hash_cache import DEFAULT_CACHE_PATH, HashCache, sha256_file
+from tools.config import CATEGORY_ORDER
+from tools.file_index import CATEGORY_DIRS, shared_index
 
-def sha256(p: Path) -> str:
+# first + last block are hashed before paying for a full read
+PARTIAL_BLOCK = 64 * 1024
+
+def partial_hash(p: Path, size: int) -> str:
+    """
+    Cheap fingerprint from the first and last block.
+    Files up to 2 blocks are read whole, so for them this equals a full content hash.
+    """
     h = hashlib.sha256()
     with p.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
+        if size <= 2 * PARTIAL_BLOCK:
+            h.update(f.read())
+        else:
+            h.update(f.read(PARTIAL_BLOCK))
+            f.seek(-PARTIAL_BLOCK, os.SEEK_END)
+            h.update(f.read(PARTIAL_BLOCK))
     return h.hexdigest()
 
-def main():
-    cat_dirs = {
-        "ui": PATHS.ui,
-        "cosmetics": PATHS.cosmetics,
-        "effects": PATHS.effects,
-        "backgrounds": PATHS.backgrounds,
-        "pet": PATHS.pet,
-        "_unmapped": PATHS.unmapped,
-    }
+def _colliding(groups: dict) -> list[Path]:
+    return [f for members in groups.values() if len(members) > 1 for f in members]
+
+def find_duplicates(
+    files: list[tuple[Path, int]], jobs: int, cache: Optional[HashCache] = None
+) -> tuple[list[Path], dict[str, int]]:
+    """
+    files: (path, size) in priority order; the first copy of each content is kept.
+    Returns (paths to remove, stage counters).
+    Stages: size -> partial hash -> full sha256, each only for files still colliding.
+    With a cache, digests of unchanged files come from it instead of the disk.
+    """
+    stats = {"files": len(files), "partial_hashed": 0, "full_hashed": 0}
+
+    by_size: dict[int, list[Path]] = {}
+    size_of: dict[Path, int] = {}
+    for f, size in files:
+        by_size.setdefault(size, []).append(f)
+        size_of[f] = size
+
+    cands = _colliding(by_size)
+    if not cands:
+        return [], stats
+
+    def partial(f: Path) -> str:
+        if cache is None:
+            return partial_hash(f, size_of[f])
+        return cache.digest(f, "partial64k", lambda p: partial_hash(p, size_of[p]))
+
+    def full(f: Path) -> str:
+        return cache.digest(f) if cache is not None else sha256_file(f)
 
-    seen: dict[str, Path] = {}
-    removed = 0
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        # hashlib releases the GIL on large updates, so threads scale here
+        partials = dict(zip(cands, pool.map(partial, cands)))
+        stats["partial_hashed"] = len(cands)
 
+        by_partial: dict[tuple[int, str], list[Path]] = {}
+        for f in cands:
+            by_partial.setdefault((size_of[f], partials[f]), []).append(f)
+
+        # small files were hashed whole in the partial stage already
+        need_full = [f for f in _colliding(by_partial) if size_of[f] > 2 * PARTIAL_BLOCK]
+        fulls = dict(zip(need_full, pool.map(full, need_full)))
+        stats["full_hashed"] = len(need_full)
+
+    seen: set[tuple[int, str]] = set()
+    remove: list[Path] = []
+    for f in cands:  # priority order is kept within each size group
+        key = (size_of[f], fulls.get(f) or partials[f])
+        if key in seen:
+            remove.append(f)
+        else:
+            seen.add(key)
+    return remove, stats
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Hashing threads")
+    ap.add_argument("--no-cache", action="store_true", help=f"Don't use {DEFAULT_CACHE_PATH}")
+    args = ap.parse_args(argv)
+
+    index = shared_index()
+    files: list[tuple[Path, int]] = []
     for cat in CATEGORY_ORDER:
-        d = cat_dirs[cat]
-        if not d.exists():
-            continue
-        for f in sorted(d.iterdir()):
-            if not f.is_file():
-                continue
-            key = sha256(f)
-            if key in seen:
-                f.unlink()
-                removed += 1
-            else:
-                seen[key] = f
-
-    print(f"[✓] Dedupe done. Removed duplicates: {removed}")
+        files.extend((e.path, e.size) for e in index.files(CATEGORY_DIRS[cat]))
+
+    cache = None if args.no_cache else HashCache(DEFAULT_CACHE_PATH)
+    try:
+        remove, stats = find_duplicates(files, args.jobs, cache)
+        for f in remove:
+            f.unlink()
+            index.removed(f)
+            if cache is not None:
+                cache.forget(f)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    print(f"[✓] Dedupe done. Removed duplicates: {len(remove)}")
+    print(f"[i] Files: {stats['files']}, partial hashes: {stats['partial_hashed']}, full hashes: {stats['full_hashed']}")
+    if cache is not None:
+        print(f"[i] Hash cache: {cache.hits} hits, {cache.misses} misses")
 
 if __name__ == "__main__":
     main()
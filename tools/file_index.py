@@ -0,0 +1,170 @@
+"""
+Shared index of the files in the asset folders (output/assets_raw/<category>).
+
+Each directory is read once with os.scandir, lazily on first use, and the tools
+then work from the index instead of their own iterdir/glob/stat passes. Stages
+that rename, delete or add files report it (renamed/removed/added) so the index
+stays correct for the stages after them. The pipeline runner resets the shared
+index at the start of every run, fingerprints step inputs from it and
+invalidates what a step wrote without reporting it; a standalone tool just
+builds a fresh one.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+import os
+from pathlib import Path
+import threading
+from typing import Dict, List, Optional
+
+from tools.config import PATHS
+
+IMG_EXTS = {".png", ".webp", ".jpg", ".jpeg"}
+
+# category -> folder, in the tools' usual order (see config.CATEGORY_ORDER)
+CATEGORY_DIRS: Dict[str, Path] = {
+    "ui": PATHS.ui,
+    "cosmetics": PATHS.cosmetics,
+    "effects": PATHS.effects,
+    "backgrounds": PATHS.backgrounds,
+    "pet": PATHS.pet,
+    "_unmapped": PATHS.unmapped,
+}
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    path: Path
+    category: str  # name of the containing folder (ui, pet, _drop_all...)
+    size: int
+    mtime_ns: int
+    ext: str  # lower-case suffix
+
+
+class FileIndex:
+    def __init__(self) -> None:
+        self._dirs: Dict[Path, Dict[str, FileEntry]] = {}
+        self._subdirs: Dict[Path, List[str]] = {}
+        self._lock = threading.RLock()
+
+    def _dir(self, d: Path) -> Dict[str, FileEntry]:
+        with self._lock:
+            entries = self._dirs.get(d)
+            if entries is None:
+                entries = {}
+                subdirs = []
+                try:
+                    with os.scandir(d) as it:
+                        for e in it:
+                            if e.is_dir(follow_symlinks=False):
+                                subdirs.append(e.name)
+                            elif e.is_file():
+                                st = e.stat()
+                                p = d / e.name
+                                entries[e.name] = FileEntry(p, d.name, st.st_size, st.st_mtime_ns, p.suffix.lower())
+                except (FileNotFoundError, NotADirectoryError):
+                    pass
+                self._dirs[d] = entries
+                self._subdirs[d] = subdirs
+            return entries
+
+    def files(self, d: Path, exts: Optional[set] = None) -> List[FileEntry]:
+        """Files directly in d, sorted by name; exts filters by lower-case suffix."""
+        with self._lock:
+            entries = sorted(self._dir(d).values(), key=lambda e: e.path.name)
+        if exts is not None:
+            entries = [e for e in entries if e.ext in exts]
+        return entries
+
+    def walk(self, d: Path) -> List[FileEntry]:
+        """Files in d and its subdirectories (unsorted)."""
+        out: List[FileEntry] = []
+        stack = [d]
+        with self._lock:
+            while stack:
+                cur = stack.pop()
+                out.extend(self._dir(cur).values())
+                stack.extend(cur / name for name in self._subdirs[cur])
+        return out
+
+    def exists(self, p: Path) -> bool:
+        return p.name in self._dir(p.parent)
+
+    def get(self, p: Path) -> Optional[FileEntry]:
+        return self._dir(p.parent).get(p.name)
+
+    def added(self, p: Path) -> None:
+        """p was created or rewritten."""
+        with self._lock:
+            entries = self._dirs.get(p.parent)
+            if entries is None:
+                return  # scanned (with p in it) on first use
+            st = p.stat()
+            entries[p.name] = FileEntry(p, p.parent.name, st.st_size, st.st_mtime_ns, p.suffix.lower())
+
+    def removed(self, p: Path) -> None:
+        with self._lock:
+            self._dirs.get(p.parent, {}).pop(p.name, None)
+
+    def renamed(self, old: Path, new: Path) -> None:
+        with self._lock:
+            entry = self._dirs.get(old.parent, {}).pop(old.name, None)
+            target = self._dirs.get(new.parent)
+            if target is None:
+                return
+            if entry is None:
+                self.added(new)
+                return
+            # a rename keeps size and mtime
+            target[new.name] = replace(entry, path=new, category=new.parent.name, ext=new.suffix.lower())
+
+    def forget(self, d: Optional[Path] = None) -> None:
+        """Drop d (or everything) so it is scanned again on next use."""
+        with self._lock:
+            if d is None:
+                self._dirs.clear()
+                self._subdirs.clear()
+            else:
+                self._dirs.pop(d, None)
+                self._subdirs.pop(d, None)
+
+    def invalidate(self, p: Path) -> None:
+        """
+        p (a file or a directory tree) was written behind the index's back:
+        forget p and everything under it, and re-read p's own entry in its parent.
+        """
+        with self._lock:
+            for d in [d for d in self._dirs if d == p or p in d.parents]:
+                self.forget(d)
+            parent = self._dirs.get(p.parent)
+            if parent is None:
+                return
+            parent.pop(p.name, None)
+            subdirs = self._subdirs[p.parent]
+            if p.name in subdirs:
+                subdirs.remove(p.name)
+            if p.is_dir():
+                subdirs.append(p.name)
+            elif p.is_file():
+                self.added(p)
+
+
+_shared: Optional[FileIndex] = None
+_shared_lock = threading.Lock()
+
+
+def shared_index() -> FileIndex:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = FileIndex()
+        return _shared
+
+
+def reset_shared_index() -> FileIndex:
+    """Fresh index for a new pipeline run (the folders may have changed in between)."""
+    global _shared
+    with _shared_lock:
+        _shared = FileIndex()
+        return _shared
@@ -1,18 +1,9 @@
 from __future__ import annotations
-from pathlib import Path
-import json
 from datetime import datetime
 
+from src.tamacore.utils import write_json, write_text
 from tools.config import PATHS
 
-def write_json(p: Path, obj):
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
-
-def write_text(p: Path, s: str):
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(s, encoding="utf-8")
-
 def main():
     PATHS.scaffold_dir.mkdir(parents=True, exist_ok=True)
 
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from pathlib import Path
-import json
 import shutil
 from datetime import datetime
 import re
 from typing import Any, Dict, List, Tuple
 
+from src.tamacore.utils import json_dumps, read_json, write_json, write_text
+
 ROOT = Path(".")
 OUT = Path("output")
 
@@ -29,16 +30,6 @@ def safe_mkdir(p: Path):
     p.mkdir(parents=True, exist_ok=True)
 
 
-def write_text(p: Path, s: str):
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(s, encoding="utf-8")
-
-
-def write_json(p: Path, obj: Any):
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(obj, indent=2, ensure_ascii=False), encoding="utf-8")
-
-
 def copy_if_exists(src: Path, dst: Path):
     if src.exists():
         dst.parent.mkdir(parents=True, exist_ok=True)
@@ -48,10 +39,25 @@ def copy_if_exists(src: Path, dst: Path):
 # -----------------------------
 # Data loaders
 # -----------------------------
-def load_frames_from_atlas() -> List[str]:
+def load_atlas() -> Dict[str, Any]:
     if not ATLAS_JSON.exists():
-        return []
-    data = json.loads(ATLAS_JSON.read_text(encoding="utf-8"))
+        return {}
+    return read_json(ATLAS_JSON)
+
+
+def atlas_pages(data: Dict[str, Any]) -> List[str]:
+    # single page: {"frames": {...}, "meta": {"image": ...}}
+    # multipack:   {"textures": [{"image": ..., "frames": [...]}, ...]}
+    if "textures" in data:
+        return [t.get("image", "") for t in data["textures"] if t.get("image")]
+    image = data.get("meta", {}).get("image")
+    return [image] if image else []
+
+
+def load_frames_from_atlas() -> List[str]:
+    data = load_atlas()
+    if "textures" in data:
+        return [f.get("filename", "") for t in data["textures"] for f in t.get("frames", [])]
     frames = list(data.get("frames", {}).keys())
     return frames
 
@@ -60,7 +66,7 @@ def load_mapping() -> Dict[str, Any]:
     if not MAPPING.exists():
         return {}
     try:
-        return json.loads(MAPPING.read_text(encoding="utf-8"))
+        return read_json(MAPPING)
     except Exception:
         return {}
 
@@ -155,6 +161,7 @@ def build_catalog(frames: List[str], mapping: Dict[str, Any]) -> Dict[str, Any]:
 
     # Build unique ids
     seen = set()
+    frame_set = set(frames)
     for fn in candidates:
         base = Path(fn).stem
         # strip category prefix if naming_pro added e.g. cosmetics__x__v001
@@ -170,7 +177,7 @@ def build_catalog(frames: List[str], mapping: Dict[str, Any]) -> Dict[str, Any]:
 
         # thumb: prefer exact frame match if present
         thumb = None
-        if fn in frames:
+        if fn in frame_set:
             thumb = fn
         else:
             # find a frame containing the stem
@@ -193,17 +200,32 @@ def build_catalog(frames: List[str], mapping: Dict[str, Any]) -> Dict[str, Any]:
             }
         )
 
-    # Cap size for v1 runtime
-    items = items[:120]
     return {"items": items}
 
 
+def build_catalog_index(catalog: Dict[str, Any]) -> Tuple[List[List[Any]], List[List[Any]]]:
+    """
+    Lookup tables for the runtime, as [key, index into items] pairs:
+      by_id:   [[id, i], ...]
+      by_slot: [[slot, [i, ...]], ...]  (catalog order within a slot)
+    """
+    by_id: List[List[Any]] = []
+    by_slot: Dict[str, List[int]] = {}
+    for i, it in enumerate(catalog.get("items", [])):
+        by_id.append([it["id"], i])
+        by_slot.setdefault(it["slot"], []).append(i)
+    return by_id, [[slot, idx] for slot, idx in by_slot.items()]
+
+
 # -----------------------------
 # Runtime JS generator
 # -----------------------------
 def build_runtime_js(sample_frames: List[str], catalog: Dict[str, Any]) -> str:
-    sample = json.dumps(sample_frames[:60], ensure_ascii=False, indent=2)
-    cat = json.dumps(catalog, ensure_ascii=False, indent=2)
+    sample = json_dumps(sample_frames[:60])
+    cat = json_dumps(catalog)
+    by_id, by_slot = build_catalog_index(catalog)
+    by_id_js = json_dumps(by_id, compact=True)
+    by_slot_js = json_dumps(by_slot, compact=True)
 
     return f"""// TamaCore Runtime (paste into a GDevelop "JavaScript code" event)
 // Generated: {datetime.utcnow().isoformat()}Z
@@ -212,14 +234,52 @@ def build_runtime_js(sample_frames: List[str], catalog: Dict[str, Any]) -> str:
 // -----------------------------
 const TC_CATALOG = {cat};
 const TC_SAMPLE_THUMBS = {sample};
+const TC_ITEMS = TC_CATALOG.items || [];
+
+// Prebuilt lookups (index pairs from the generator): id -> item, slot -> items
+const TC_ITEM_BY_ID = new Map({by_id_js}.map(([id, i]) => [id, TC_ITEMS[i]]));
+const TC_ITEMS_BY_SLOT = new Map({by_slot_js}.map(([slot, idx]) => [slot, idx.map(i => TC_ITEMS[i])]));
 
 // -----------------------------
 // GLOBAL SAVE (Storage)
 // -----------------------------
+// Save format v2: {{v:2, t:<saved at ms>, d:[values in TC_SAVE_FIELDS order]}}.
+// Only persistent fields are stored (no UI memory); owned is an array on disk,
+// a Set in memory. v1 saves (the whole state object) are still read.
+const TC_SAVE_KEY = "tc_save_v2";
+const TC_SAVE_KEY_V1 = "tc_save_v1";
+const TC_SAVE_VERSION = 2;
+const TC_SAVE_FIELDS = [
+  "coins", "gems", "boxes", "level", "xp",
+  "hunger", "energy", "clean", "lastCareAt", "isDead",
+  "dailyChestDay", "dailyStreak", "owned", "equipped",
+  "cd_adRewardUntil", "cd_gachaUntil", "events",
+];
+const TC_SAVE_INTERVAL_MS = 10000; // at most one write per interval
+
+let __tc_dirty = false;    // state changed since the last write
+let __tc_saved_at = 0;     // Date.now() of the last write
+
+function tc_mark_dirty() {{ __tc_dirty = true; }}
+
+function tc_unpack(data) {{
+  const state = tc_default_state();
+  if (data && data.v === TC_SAVE_VERSION && Array.isArray(data.d)) {{
+    for (let i=0;i<TC_SAVE_FIELDS.length;i++) {{
+      if (data.d[i] !== undefined && data.d[i] !== null) state[TC_SAVE_FIELDS[i]] = data.d[i];
+    }}
+    state.savedAt = data.t;
+  }} else if (data && typeof data === "object") {{
+    for (const k of TC_SAVE_FIELDS) if (data[k] !== undefined) state[k] = data[k];
+  }}
+  state.owned = new Set(Array.isArray(state.owned) ? state.owned : []);
+  return state;
+}}
+
 function tc_load() {{
   try {{
-    const raw = localStorage.getItem("tc_save_v1");
-    return raw ? JSON.parse(raw) : null;
+    const raw = localStorage.getItem(TC_SAVE_KEY) || localStorage.getItem(TC_SAVE_KEY_V1);
+    return raw ? tc_unpack(JSON.parse(raw)) : null;
   }} catch(e) {{
     console.log("load fail", e);
     return null;
@@ -228,7 +288,11 @@ function tc_load() {{
 
 function tc_save(state) {{
   try {{
-    localStorage.setItem("tc_save_v1", JSON.stringify(state));
+    const now = Date.now();
+    const d = TC_SAVE_FIELDS.map(k => k === "owned" ? Array.from(state.owned) : state[k]);
+    localStorage.setItem(TC_SAVE_KEY, JSON.stringify({{v: TC_SAVE_VERSION, t: now, d}}));
+    __tc_saved_at = now;
+    __tc_dirty = false;
     return true;
   }} catch(e) {{
     console.log("save fail", e);
@@ -236,6 +300,16 @@ function tc_save(state) {{
   }}
 }}
 
+// Writes only if something changed since the last save.
+function tc_flush(state) {{
+  if (__tc_dirty && state) tc_save(state);
+}}
+
+// Dirty state is written at most once per TC_SAVE_INTERVAL_MS while playing.
+function tc_autosave(state, now) {{
+  if (__tc_dirty && now - __tc_saved_at >= TC_SAVE_INTERVAL_MS) tc_save(state);
+}}
+
 // -----------------------------
 // DEFAULT STATE
 // -----------------------------
@@ -260,7 +334,7 @@ function tc_default_state() {{
     dailyStreak: 0,
 
     // inventory
-    owned: [], // item ids
+    owned: new Set(), // item ids (insertion order = purchase order)
     equipped: {{ skin:"none", hat:"none", glasses:"none" }},
 
     // UI memory
@@ -283,23 +357,42 @@ function tc_inc_event(state, key, by=1) {{ state.events[key] = (state.events[key
 function tc_clamp100(x) {{ x = Math.floor(x); return Math.max(0, Math.min(100, x)); }}
 function tc_care_ok(state) {{ return state.hunger > 0 && state.energy > 0 && state.clean > 0; }}
 
-function tc_decay(state, dtMs) {{
-  // decay per hour
-  const dh = dtMs / 3600000.0;
-  state.hunger = tc_clamp100(state.hunger - 2.2 * dh);
-  state.energy = tc_clamp100(state.energy - 1.6 * dh);
-  state.clean  = tc_clamp100(state.clean  - 1.2 * dh);
-
-  if (tc_care_ok(state)) state.lastCareAt = Date.now();
-
-  // 7 day death if any stat is 0 long enough
-  if (!state.isDead && !tc_care_ok(state)) {{
-    const sevenDays = 7 * 24 * 60 * 60 * 1000;
-    if (Date.now() - state.lastCareAt >= sevenDays) {{
-      state.isDead = true;
-      tc_inc_event(state, "pet_died");
-    }}
+// Stats fall linearly (points per hour) and stop at 0; they are kept fractional
+// and only floored for display.
+const TC_DECAY_PER_HOUR = [["hunger", 2.2], ["energy", 1.6], ["clean", 1.2]];
+const TC_DEATH_MS = 7 * 24 * 60 * 60 * 1000; // neglected (a stat at 0) this long = dead
+
+function tc_clamp(x) {{ return Math.max(0, Math.min(100, x)); }}
+
+// Closed form, O(1) for any interval: a frame or a week away gives the same
+// result as one step. lastCareAt is the last moment care was OK: actions stamp
+// it, and here it becomes the time the first stat reached 0 (if that happened
+// in the interval), so the 7-day death clock runs from the real zero crossing.
+function tc_decay(state, dtMs, now) {{
+  if (!(dtMs > 0)) return;
+  const from = now - dtMs;
+  const wasOk = tc_care_ok(state);
+  let firstZero = Infinity;
+  for (let i=0;i<TC_DECAY_PER_HOUR.length;i++) {{
+    const k = TC_DECAY_PER_HOUR[i][0], perMs = TC_DECAY_PER_HOUR[i][1] / 3600000.0;
+    const v = state[k];
+    if (v > 0 && v <= perMs * dtMs) firstZero = Math.min(firstZero, from + v / perMs);
+    state[k] = tc_clamp(v - perMs * dtMs);
   }}
+  if (wasOk && firstZero !== Infinity) state.lastCareAt = firstZero;
+
+  if (!state.isDead && !tc_care_ok(state) && now - state.lastCareAt >= TC_DEATH_MS) {{
+    state.isDead = true;
+    tc_inc_event(state, "pet_died");
+    tc_mark_dirty();
+  }}
+}}
+
+// Runs once on load: everything that happened since the save, in one step.
+// The decay itself isn't saved (nothing is dirty): the next load recomputes
+// it from the same save timestamp.
+function tc_catch_up(state, now) {{
+  if (state.savedAt) tc_decay(state, now - state.savedAt, now);
 }}
 
 function tc_ensure_daily(state) {{
@@ -373,13 +466,24 @@ function tc_revive(state) {{
 }}
 
 function tc_find_item(id) {{
-  const items = TC_CATALOG.items || [];
-  for (let i=0;i<items.length;i++) if (items[i].id === id) return items[i];
-  return null;
+  return TC_ITEM_BY_ID.get(id) || null;
+}}
+
+function tc_items_in_slot(slot) {{
+  return TC_ITEMS_BY_SLOT.get(slot) || [];
 }}
 
 function tc_owns(state, id) {{
-  return state.owned.indexOf(id) >= 0;
+  return state.owned.has(id);
+}}
+
+function tc_owned_first(state, n) {{
+  const out = [];
+  for (const id of state.owned) {{
+    if (out.length >= n) break;
+    out.push(id);
+  }}
+  return out;
 }}
 
 function tc_buy(state, id) {{
@@ -391,7 +495,7 @@ function tc_buy(state, id) {{
 
   state.coins -= it.priceCoins;
   state.gems  -= it.priceGems;
-  state.owned.push(id);
+  state.owned.add(id);
   tc_inc_event(state, "buy_" + it.rarity);
   return {{ok:true, msg:`Bought ${{it.name}} ✅`}};
 }}
@@ -412,9 +516,18 @@ function tc_equip(state, id) {{
 // -----------------------------
 // GDevelop UI helpers
 // -----------------------------
+// Handles are looked up once per scene (null = object not in this scene);
+// tc_invalidate() drops them when the scene changes.
+const __tc_objs = new Map();
+
 function tc_obj(runtimeScene, name) {{
-  const arr = runtimeScene.getObjects(name);
-  return arr && arr.length ? arr[0] : null;
+  let o = __tc_objs.get(name);
+  if (o === undefined) {{
+    const arr = runtimeScene.getObjects(name);
+    o = arr && arr.length ? arr[0] : null;
+    __tc_objs.set(name, o);
+  }}
+  return o;
 }}
 
 function tc_set_text(runtimeScene, name, s) {{
@@ -427,7 +540,53 @@ function tc_toast(runtimeScene, msg) {{
   if (t) t.setString(msg);
 }}
 
+// -----------------------------
+// Dirty tracking: setString re-lays out and re-uploads the text texture,
+// so texts are only rebuilt when what they show has changed.
+// -----------------------------
+let __tc_version = 0;       // bumped by every action that changes state
+let __tc_scene = null;      // scene of the previous tick
+const __tc_drawn = new Map(); // text object name -> __tc_version it shows
+const __tc_hud_last = [];   // floored HUD values last drawn
+const TC_HUD_FIELDS = ["coins", "gems", "boxes", "hunger", "energy", "clean"];
+
+function tc_changed() {{ __tc_version++; tc_mark_dirty(); }}
+
+function tc_invalidate() {{
+  // a scene (re)appeared: its texts may show anything
+  __tc_drawn.clear();
+  __tc_hud_last.length = 0;
+  __tc_objs.clear();
+  __tc_input = null;
+  __tc_buttons = null;
+}}
+
+function tc_is_drawn(name) {{
+  if (__tc_drawn.get(name) === __tc_version) return true;
+  __tc_drawn.set(name, __tc_version);
+  return false;
+}}
+
+function tc_hud_dirty(state) {{
+  let dirty = false;
+  const n = TC_HUD_FIELDS.length;
+  for (let i=0;i<n;i++) {{
+    const v = Math.floor(state[TC_HUD_FIELDS[i]]);
+    if (__tc_hud_last[i] !== v) {{ __tc_hud_last[i] = v; dirty = true; }}
+  }}
+  const flags = (state.isDead ? 1 : 0) | (tc_chest_ready(state) ? 2 : 0);
+  if (__tc_hud_last[n] !== flags) {{ __tc_hud_last[n] = flags; dirty = true; }}
+  if (__tc_hud_last[n+1] !== state.dailyStreak) {{ __tc_hud_last[n+1] = state.dailyStreak; dirty = true; }}
+  return dirty;
+}}
+
+function tc_act(runtimeScene, r) {{
+  tc_changed();
+  tc_toast(runtimeScene, r.msg);
+}}
+
 function tc_draw_hud(runtimeScene, state) {{
+  if (!tc_hud_dirty(state)) return;
   const h = tc_obj(runtimeScene, "TxtHUD");
   if (!h) return;
   h.setString(
@@ -439,6 +598,7 @@ function tc_draw_hud(runtimeScene, state) {{
 }}
 
 function tc_apply_equipped(runtimeScene, state) {{
+  if (tc_is_drawn("equipped")) return;
   // overlays are optional; if you don't create PetHat/PetGlasses it won't crash
   const pet = tc_obj(runtimeScene, "Pet");
   const hat = tc_obj(runtimeScene, "PetHat");
@@ -458,24 +618,51 @@ function tc_apply_equipped(runtimeScene, state) {{
 }}
 
 // -----------------------------
-// Click hit-test (simple)
+// Click hit-test
 // -----------------------------
-function tc_hit(runtimeScene, objName) {{
-  const input = runtimeScene.getGame().getInputManager();
-  const click = input.isMouseButtonReleased("Left");
-  if (!click) return false;
-  const o = tc_obj(runtimeScene, objName);
-  if (!o) return false;
+let __tc_input = null;   // input manager, cached per scene
+let __tc_buttons = null; // [name, object] for every TC_ACTIONS button in the current scene
+
+function tc_input(runtimeScene) {{
+  return __tc_input || (__tc_input = runtimeScene.getGame().getInputManager());
+}}
+
+function tc_inside(o, mx, my) {{
+  return mx >= o.getX() && mx <= o.getX() + o.getWidth() && my >= o.getY() && my <= o.getY() + o.getHeight();
+}}
+
+// Looked up once per scene: any button with an action works in any scene
+// it is placed in (e.g. BtnShop added to Inventory in the editor).
+function tc_scene_buttons(runtimeScene) {{
+  if (__tc_buttons) return __tc_buttons;
+  __tc_buttons = [];
+  for (const name in TC_ACTIONS) {{
+    const o = tc_obj(runtimeScene, name);
+    if (o) __tc_buttons.push([name, o]);
+  }}
+  return __tc_buttons;
+}}
+
+// Name of the button released this frame, or null. One input read per frame;
+// bounds are only tested on the frame the mouse/touch is released.
+function tc_released_button(runtimeScene) {{
+  const input = tc_input(runtimeScene);
+  if (!input.isMouseButtonReleased("Left")) return null;
   const mx = input.getMouseX(runtimeScene);
   const my = input.getMouseY(runtimeScene);
-  return mx >= o.getX() && mx <= o.getX() + o.getWidth() && my >= o.getY() && my <= o.getY() + o.getHeight();
+  const buttons = tc_scene_buttons(runtimeScene);
+  for (let i=0;i<buttons.length;i++) {{
+    if (tc_inside(buttons[i][1], mx, my)) return buttons[i][0];
+  }}
+  return null;
 }}
 
 // -----------------------------
 // Scene-specific UI
 // -----------------------------
 function tc_render_shop(runtimeScene, state) {{
-  const items = (TC_CATALOG.items || []).slice(0, 6);
+  if (tc_is_drawn("TxtShop")) return;
+  const items = TC_ITEMS.slice(0, 6);
   // expects Text objects: TxtShop
   let lines = [];
   for (let i=0;i<items.length;i++) {{
@@ -487,8 +674,9 @@ function tc_render_shop(runtimeScene, state) {{
 }}
 
 function tc_render_inventory(runtimeScene, state) {{
+  if (tc_is_drawn("TxtInv")) return;
   // expects Text: TxtInv
-  const owned = state.owned.slice(0, 6);
+  const owned = tc_owned_first(state, 6);
   let lines = [];
   for (let i=0;i<owned.length;i++) {{
     const it = tc_find_item(owned[i]);
@@ -499,81 +687,80 @@ function tc_render_inventory(runtimeScene, state) {{
   tc_set_text(runtimeScene, "TxtInv", "INVENTORY\\n" + lines.join("\\n") + "\\nBtnBack to Home.");
 }}
 
+// -----------------------------
+// Button actions (name -> handler)
+// -----------------------------
+const TC_ACTIONS = {{
+  // Home
+  BtnFeed:  (rs, s) => tc_act(rs, tc_feed(s)),
+  BtnSleep: (rs, s) => tc_act(rs, tc_sleep(s)),
+  BtnClean: (rs, s) => tc_act(rs, tc_clean(s)),
+  BtnChest: (rs, s) => tc_act(rs, tc_claim_chest(s)),
+
+  // Navigation (optional)
+  BtnShop: (rs, s) => {{ rs.getGame().getSceneStack().push("Shop"); tc_toast(rs, "Shop 🛒"); }},
+  BtnInventory: (rs, s) => {{ rs.getGame().getSceneStack().push("Inventory"); tc_toast(rs, "Inventory 🎒"); }},
+  BtnBack: (rs, s) => {{ rs.getGame().getSceneStack().pop(); tc_toast(rs, "Back"); }},
+
+  // Shop revive
+  BtnRevive: (rs, s) => tc_act(rs, tc_revive(s)),
+}};
+
+for (let i=1;i<=6;i++) {{
+  // Shop: buy catalog item i (Slot1..Slot6 sprites)
+  TC_ACTIONS["Slot" + i] = (rs, s) => {{
+    const it = TC_ITEMS[i-1];
+    if (it) tc_act(rs, tc_buy(s, it.id));
+  }};
+  // Inventory: equip owned item i (Inv1..Inv6 sprites)
+  TC_ACTIONS["Inv" + i] = (rs, s) => {{
+    const id = tc_owned_first(s, i)[i-1];
+    if (id) tc_act(rs, tc_equip(s, id));
+  }};
+}}
+
 // -----------------------------
 // MAIN TICK
 // -----------------------------
 let __tc_state = null;
 let __tc_last = Date.now();
 
+// The page can be closed or backgrounded at any time: write pending changes then.
+function tc_install_flush() {{
+  if (typeof document !== "undefined") {{
+    document.addEventListener("visibilitychange", () => {{
+      if (document.visibilityState === "hidden") tc_flush(__tc_state);
+    }});
+  }}
+  if (typeof window !== "undefined") {{
+    window.addEventListener("pagehide", () => tc_flush(__tc_state));
+  }}
+}}
+
 function tc_tick(runtimeScene) {{
   if (!__tc_state) {{
     __tc_state = tc_load() || tc_default_state();
     __tc_last = Date.now();
+    __tc_saved_at = __tc_last;
+    tc_catch_up(__tc_state, __tc_last);
+    tc_install_flush();
+  }}
+  if (runtimeScene !== __tc_scene) {{
+    __tc_scene = runtimeScene;
+    tc_invalidate();
   }}
 
   const now = Date.now();
-  const dt = Math.min(60000, now - __tc_last);
+  const dt = now - __tc_last;  // after a pause this is the whole pause (still O(1))
   __tc_last = now;
 
-  tc_decay(__tc_state, dt);
+  tc_decay(__tc_state, dt, now);
   tc_ensure_daily(__tc_state);
 
-  // Global buttons on Home
-  if (tc_hit(runtimeScene, "BtnFeed")) {{
-    tc_toast(runtimeScene, tc_feed(__tc_state).msg);
-  }}
-  if (tc_hit(runtimeScene, "BtnSleep")) {{
-    tc_toast(runtimeScene, tc_sleep(__tc_state).msg);
-  }}
-  if (tc_hit(runtimeScene, "BtnClean")) {{
-    tc_toast(runtimeScene, tc_clean(__tc_state).msg);
-  }}
-  if (tc_hit(runtimeScene, "BtnChest")) {{
-    tc_toast(runtimeScene, tc_claim_chest(__tc_state).msg);
-  }}
-
-  // Navigation buttons (optional)
-  if (tc_hit(runtimeScene, "BtnShop")) {{
-    runtimeScene.getGame().getSceneStack().push("Shop");
-    tc_toast(runtimeScene, "Shop 🛒");
-  }}
-  if (tc_hit(runtimeScene, "BtnInventory")) {{
-    runtimeScene.getGame().getSceneStack().push("Inventory");
-    tc_toast(runtimeScene, "Inventory 🎒");
-  }}
-  if (tc_hit(runtimeScene, "BtnBack")) {{
-    runtimeScene.getGame().getSceneStack().pop();
-    tc_toast(runtimeScene, "Back");
-  }}
-
-  // Shop actions (expects Slot1..Slot6 sprites)
-  for (let i=1;i<=6;i++) {{
-    if (tc_hit(runtimeScene, "Slot" + i)) {{
-      const it = (TC_CATALOG.items || [])[i-1];
-      if (it) {{
-        const r = tc_buy(__tc_state, it.id);
-        tc_toast(runtimeScene, r.msg);
-      }}
-    }}
-  }}
-
-  // Inventory equip (expects Inv1..Inv6 sprites)
-  for (let i=1;i<=6;i++) {{
-    if (tc_hit(runtimeScene, "Inv" + i)) {{
-      const id = __tc_state.owned[i-1];
-      if (id) {{
-        const r = tc_equip(__tc_state, id);
-        tc_toast(runtimeScene, r.msg);
-      }}
-    }}
-  }}
-
-  // Shop revive
-  if (tc_hit(runtimeScene, "BtnRevive")) {{
-    tc_toast(runtimeScene, tc_revive(__tc_state).msg);
-  }}
+  const pressed = tc_released_button(runtimeScene);
+  if (pressed) TC_ACTIONS[pressed](runtimeScene, __tc_state);
 
-  // Renders
+  // Renders (each returns early unless its inputs changed)
   tc_draw_hud(runtimeScene, __tc_state);
   tc_apply_equipped(runtimeScene, __tc_state);
 
@@ -581,8 +768,7 @@ function tc_tick(runtimeScene) {{
   tc_render_shop(runtimeScene, __tc_state);
   tc_render_inventory(runtimeScene, __tc_state);
 
-  // autosave every ~10s
-  if (now % 10000 < 30) tc_save(__tc_state);
+  tc_autosave(__tc_state, now);
 }}
 """
 
@@ -649,6 +835,7 @@ def build_import_checklist() -> str:
 ## 1) Import assets (Atlas)
 1. Project manager → Resources
 2. Add → Image → select: output/gdevelop_pack/assets/atlas.png
+   (large libraries are split into atlas_0.png, atlas_1.png, ... — add every page)
 3. Optional: if your GDevelop supports atlas JSON import:
    - Import spritesheet/atlas frames using output/gdevelop_pack/assets/atlas.json
 
@@ -720,10 +907,16 @@ def main():
     safe_mkdir(CODE)
     safe_mkdir(DOCS)
 
-    # Copy atlas if exists
-    if ATLAS_PNG.exists() and ATLAS_JSON.exists():
-        copy_if_exists(ATLAS_PNG, ASSETS / "atlas.png")
+    # Copy atlas (every page) if exists
+    pages = atlas_pages(load_atlas())
+    if pages and all((ATLAS_DIR / page).exists() for page in pages):
+        for page in pages:
+            copy_if_exists(ATLAS_DIR / page, ASSETS / page)
         copy_if_exists(ATLAS_JSON, ASSETS / "atlas.json")
+        # pages from an earlier, bigger atlas would otherwise linger
+        for old in ASSETS.glob("atlas*.png"):
+            if old.name not in pages:
+                old.unlink()
     else:
         print("[!] Atlas missing. Run atlas_pack.py first to generate atlas.png/json")
 
@@ -744,10 +937,10 @@ def main():
     copy_if_exists(MAPPING, DOCS / "mapping.json")
 
     # Export catalog for debugging
-    write_json(DOCS / "catalog.json", catalog)
+    write_json(DOCS / "catalog.json", catalog, compact=True)
 
     print("[✓] GDevelop pack generated at:", PACK)
-    print(" - assets/atlas.png + atlas.json")
+    print(f" - assets/{' + '.join(pages) or 'atlas.png'} + atlas.json")
     print(" - code/tamacore_runtime.js")
     print(" - docs/IMPORT_CHECKLIST.md + layouts.json + catalog.json")
 
@@ -0,0 +1,108 @@
+"""
+Dependency-free image size reader (PNG / JPEG / WebP).
+
+Only the header bytes are read (JPEG seeks from segment to segment), no decoder
+is involved. Modes use Pillow's names so reports look the same as before.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import struct
+from typing import BinaryIO, Optional, Tuple
+
+PNG_SIG = b"\x89PNG\r\n\x1a\n"
+
+# PNG colour type -> Pillow mode (8-bit); bit depth refines grey below
+_PNG_MODES = {0: "L", 2: "RGB", 3: "P", 4: "LA", 6: "RGBA"}
+
+# SOFn markers carry the frame size; C4 (DHT), C8 (JPG), CC (DAC) share the range but don't
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_JPEG_MODES = {1: "L", 3: "RGB", 4: "CMYK"}
+
+ImageSize = Tuple[int, int, Optional[str]]
+
+
+def _png(head: bytes) -> ImageSize:
+    if len(head) < 33 or head[12:16] != b"IHDR":
+        raise ValueError("PNG without IHDR")
+    w, h, depth, ctype = struct.unpack(">IIBB", head[16:26])
+    mode = _PNG_MODES.get(ctype)
+    if ctype == 0 and depth == 1:
+        mode = "1"
+    elif ctype == 0 and depth == 16:
+        mode = "I;16"
+    return w, h, mode
+
+
+def _jpeg(f: BinaryIO) -> ImageSize:
+    f.seek(2)
+    while True:
+        b = f.read(1)
+        if not b:
+            raise ValueError("JPEG without SOF marker")
+        if b != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":  # fill bytes
+            marker = f.read(1)
+        if not marker:
+            raise ValueError("Truncated JPEG")
+        m = marker[0]
+        if m == 0x01 or 0xD0 <= m <= 0xD8:  # standalone markers, no length
+            continue
+        if m == 0xD9 or m == 0xDA:  # EOI / SOS before any frame header
+            raise ValueError("JPEG without SOF marker")
+        seg = f.read(2)
+        if len(seg) < 2:
+            raise ValueError("Truncated JPEG")
+        length = struct.unpack(">H", seg)[0]
+        if m in _JPEG_SOF:
+            sof = f.read(6)
+            if len(sof) < 6:
+                raise ValueError("Truncated JPEG")
+            _precision, h, w, ncomp = struct.unpack(">BHHB", sof)
+            return w, h, _JPEG_MODES.get(ncomp)
+        f.seek(length - 2, 1)
+
+
+def _webp(head: bytes) -> ImageSize:
+    chunk = head[12:16]
+    data = head[20:]
+    if chunk == b"VP8 ":
+        if len(data) < 10 or data[3:6] != b"\x9d\x01\x2a":
+            raise ValueError("Bad VP8 frame header")
+        w, h = struct.unpack("<HH", data[6:10])
+        return w & 0x3FFF, h & 0x3FFF, "RGB"
+    if chunk == b"VP8L":
+        if len(data) < 5 or data[0] != 0x2F:
+            raise ValueError("Bad VP8L header")
+        bits = struct.unpack("<I", data[1:5])[0]
+        w = (bits & 0x3FFF) + 1
+        h = ((bits >> 14) & 0x3FFF) + 1
+        alpha = (bits >> 28) & 1
+        return w, h, "RGBA" if alpha else "RGB"
+    if chunk == b"VP8X":
+        if len(data) < 10:
+            raise ValueError("Bad VP8X header")
+        flags = data[0]
+        w = int.from_bytes(data[4:7], "little") + 1
+        h = int.from_bytes(data[7:10], "little") + 1
+        return w, h, "RGBA" if flags & 0x10 else "RGB"
+    raise ValueError(f"Unknown WebP chunk: {chunk!r}")
+
+
+def read_image_size(path: Path) -> ImageSize:
+    """
+    Returns (width, height, mode) from the file header.
+    Raises ValueError for unknown/broken headers.
+    """
+    with path.open("rb") as f:
+        head = f.read(64)
+        if head.startswith(PNG_SIG):
+            return _png(head)
+        if head.startswith(b"\xff\xd8"):
+            return _jpeg(f)
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return _webp(head)
+    raise ValueError("Unsupported image format")
@@ -1,11 +1,21 @@
 from pathlib import Path
-import shutil
+import argparse
+
+from src.tamacore.hash_cache import DEFAULT_CACHE_PATH, HashCache
+from src.tamacore.transfer import TRANSFER_MODES, transfer_file
+from tools.config import TRANSFER_MODE
+from tools.file_index import shared_index
 
 EXTRA = Path("input") / "extra_images"
 DROP = Path("output") / "assets_raw" / "_drop_all"
 ALLOWED = {".png", ".jpg", ".jpeg", ".webp"}
 
-def main():
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--transfer", choices=TRANSFER_MODES, default=TRANSFER_MODE,
+                    help="copy | hardlink | reflink | symlink (falls back to copy if unsupported)")
+    args = ap.parse_args(argv)
+
     DROP.mkdir(parents=True, exist_ok=True)
 
     if not EXTRA.exists():
@@ -13,21 +23,41 @@ def main():
         return
 
     copied = 0
-    for p in EXTRA.rglob("*"):
-        if p.is_file() and p.suffix.lower() in ALLOWED:
-            dest = DROP / p.name
-            if dest.exists():
-                i = 2
-                while True:
-                    cand = DROP / f"{p.stem}_{i}{p.suffix.lower()}"
-                    if not cand.exists():
-                        dest = cand
-                        break
-                    i += 1
-            shutil.copy2(p, dest)
-            copied += 1
-
-    print(f"[✓] Ingested {copied} extra images -> {DROP}")
+    skipped = 0
+    used: dict[str, int] = {}
+    index = shared_index()
+    with HashCache(DEFAULT_CACHE_PATH) as cache:
+        for entry in sorted(index.walk(EXTRA), key=lambda e: e.path.as_posix()):
+            p = entry.path
+            if entry.ext in ALLOWED:
+                # same content already ingested under this name (or a _N variant) -> nothing to do
+                dest = DROP / p.name
+                if index.exists(dest):
+                    digest = cache.digest(p)
+                    if cache.digest(dest) == digest:
+                        skipped += 1
+                        continue
+                    i = 2
+                    while True:
+                        cand = DROP / f"{p.stem}_{i}{p.suffix.lower()}"
+                        if not index.exists(cand):
+                            dest = cand
+                            break
+                        if cache.digest(cand) == digest:
+                            dest = None
+                            break
+                        i += 1
+                    if dest is None:
+                        skipped += 1
+                        continue
+                mode = transfer_file(p, dest, args.transfer)
+                index.added(dest)
+                used[mode] = used.get(mode, 0) + 1
+                copied += 1
+
+    print(f"[✓] Ingested {copied} extra images -> {DROP} (unchanged, skipped: {skipped})")
+    if args.transfer != "copy":
+        print(f"[i] Transfer modes used: {used}")
 
 if __name__ == "__main__":
     main()
@@ -2,7 +2,8 @@ from __future__ import annotations
 from pathlib import Path
 import re
 
-from tools.config import PATHS, ILLEGAL_CHARS, MAX_STEM_LEN, RENAME_FORMAT, DEFAULT_VERSION, CATEGORY_ORDER
+from tools.config import ILLEGAL_CHARS, MAX_STEM_LEN, RENAME_FORMAT, DEFAULT_VERSION, CATEGORY_ORDER
+from tools.file_index import CATEGORY_DIRS, FileIndex, shared_index
 
 def safe_stem(s: str) -> str:
     s = s.strip()
@@ -14,12 +15,18 @@ def safe_stem(s: str) -> str:
     s = s.lower()
     return s[:MAX_STEM_LEN]
 
-def rename_in_dir(category: str, d: Path, version: int = DEFAULT_VERSION) -> int:
-    if not d.exists():
-        return 0
+def is_named(stem: str, category: str, version: int = DEFAULT_VERSION) -> bool:
+    """True if stem already has RENAME_FORMAT's shape (optionally with a _N collision suffix)."""
+    prefix, suffix = RENAME_FORMAT.format(category=category, name="\0", version=str(version).zfill(3)).split("\0")
+    return stem.startswith(prefix) and re.sub(r"_\d+$", "", stem).endswith(suffix)
+
+def rename_in_dir(category: str, d: Path, version: int = DEFAULT_VERSION, index: FileIndex | None = None) -> int:
+    index = index or shared_index()
     renamed = 0
-    for f in sorted(d.iterdir()):
-        if not f.is_file():
+    for entry in index.files(d):
+        f = entry.path
+        # already renamed on an earlier run: renaming again would stack prefixes
+        if is_named(f.stem, category, version) and f.suffix == f.suffix.lower():
             continue
         stem = safe_stem(f.stem)
         new_stem = RENAME_FORMAT.format(category=category, name=stem, version=str(version).zfill(3))
@@ -31,27 +38,20 @@ def rename_in_dir(category: str, d: Path, version: int = DEFAULT_VERSION) -> int
         # avoid collisions
         i = 2
         cand = new_path
-        while cand.exists():
+        while index.exists(cand):
             cand = f.with_name(f"{new_stem}_{i}{f.suffix.lower()}")
             i += 1
 
         f.rename(cand)
+        index.renamed(f, cand)
         renamed += 1
 
     return renamed
 
 def main():
     total = 0
-    cat_dirs = {
-        "ui": PATHS.ui,
-        "cosmetics": PATHS.cosmetics,
-        "effects": PATHS.effects,
-        "backgrounds": PATHS.backgrounds,
-        "pet": PATHS.pet,
-        "_unmapped": PATHS.unmapped,
-    }
     for cat in CATEGORY_ORDER:
-        d = cat_dirs[cat]
+        d = CATEGORY_DIRS[cat]
         total += rename_in_dir(cat, d, DEFAULT_VERSION)
 
     print(f"[✓] Naming PRO done. Renamed files: {total}")
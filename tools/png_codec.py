@@ -0,0 +1,468 @@
+"""
+Dependency-free PNG reader/writer and a minimal RGBA image for atlas building.
+
+Decoding handles 8-bit RGBA/RGB/grey/grey+alpha, palette (with tRNS), 1/2/4-bit
+grey and palette, 16-bit (reduced to 8) and Adam7 interlacing. Everything is
+turned into 8-bit RGBA rows in a bytearray; channel shuffles use slice
+assignment and bytes.translate so the per-byte Python work is the unfiltering.
+iter_png_rows() decodes a non-interlaced file row by row from an open file, for
+callers that must not hold the whole image (atlas page updates).
+
+The writer picks a filter per row (None/Sub/Up), streams the rows through one
+zlib compressor and emits IDAT chunks as they fill, so callers never need the
+whole encoded file in memory. With jobs > 1 rows are grouped into blocks that are
+deflated on worker threads (zlib releases the GIL) and stitched into one zlib
+stream the way pigz does it.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import struct
+import zlib
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+PNG_SIG = b"\x89PNG\r\n\x1a\n"
+IDAT_CHUNK = 256 * 1024
+# uncompressed bytes per parallel deflate block; each block is primed with the
+# last DEFLATE_WINDOW bytes of the one before so matches still reach back
+DEFLATE_BLOCK = 512 * 1024
+DEFLATE_WINDOW = 32 * 1024
+
+# 4-byte array type so a whole RGBA pixel moves as one item (rotation, Adam7 scatter)
+_PX = "I" if array("I").itemsize == 4 else "L"
+
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+_ADAM7 = [(0, 0, 8, 8), (4, 0, 8, 8), (0, 4, 4, 8), (2, 0, 4, 4), (0, 2, 2, 4), (1, 0, 2, 2), (0, 1, 1, 2)]
+
+
+class RGBAImage:
+    """8-bit RGBA pixels, row-major, no padding."""
+
+    __slots__ = ("width", "height", "pixels")
+
+    def __init__(self, width: int, height: int, pixels: Optional[bytearray] = None):
+        self.width = width
+        self.height = height
+        self.pixels = pixels if pixels is not None else bytearray(width * height * 4)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def crop(self, box: Tuple[int, int, int, int]) -> "RGBAImage":
+        l, t, r, b = box
+        stride = self.width * 4
+        out = bytearray()
+        for y in range(t, b):
+            out += self.pixels[y * stride + l * 4:y * stride + r * 4]
+        return RGBAImage(r - l, b - t, out)
+
+    def rotate_cw(self) -> "RGBAImage":
+        """90° clockwise: column x (bottom to top) becomes row x."""
+        src = array(_PX, bytes(self.pixels))
+        out = array(_PX)
+        w = self.width
+        for x in range(w):
+            out.extend(src[x::w][::-1])
+        return RGBAImage(self.height, self.width, bytearray(out.tobytes()))
+
+    def alpha_bbox(self) -> Optional[Tuple[int, int, int, int]]:
+        """(left, top, right, bottom) of pixels with alpha > 0, None if fully transparent."""
+        w = self.width
+        stride = w * 4
+        left, right, top, bottom = w, 0, None, 0
+        for y in range(self.height):
+            alpha = bytes(self.pixels[y * stride + 3:(y + 1) * stride:4])
+            lead = len(alpha) - len(alpha.lstrip(b"\x00"))
+            if lead == w:
+                continue
+            if top is None:
+                top = y
+            bottom = y + 1
+            left = min(left, lead)
+            right = max(right, len(alpha.rstrip(b"\x00")))
+        if top is None:
+            return None
+        return left, top, right, bottom
+
+
+# -----------------------------
+# Decoding
+# -----------------------------
+def _unfilter(
+    data: bytes, pos: int, rows: int, row_bytes: int, bpp: int, prev: Optional[bytearray] = None
+) -> Tuple[list, int]:
+    out = []
+    prev = prev if prev is not None else bytearray(row_bytes)
+    for _ in range(rows):
+        ftype = data[pos]
+        line = bytearray(data[pos + 1:pos + 1 + row_bytes])
+        pos += 1 + row_bytes
+        if ftype == 1:  # Sub
+            for i in range(bpp, row_bytes):
+                line[i] = (line[i] + line[i - bpp]) & 0xFF
+        elif ftype == 2:  # Up
+            line = bytearray([(a + b) & 0xFF for a, b in zip(line, prev)])
+        elif ftype == 3:  # Average
+            for i in range(row_bytes):
+                left = line[i - bpp] if i >= bpp else 0
+                line[i] = (line[i] + ((left + prev[i]) >> 1)) & 0xFF
+        elif ftype == 4:  # Paeth
+            for i in range(row_bytes):
+                a = line[i - bpp] if i >= bpp else 0
+                b = prev[i]
+                c = prev[i - bpp] if i >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                if pa <= pb and pa <= pc:
+                    pred = a
+                elif pb <= pc:
+                    pred = b
+                else:
+                    pred = c
+                line[i] = (line[i] + pred) & 0xFF
+        elif ftype != 0:
+            raise ValueError(f"Bad PNG filter type {ftype}")
+        out.append(line)
+        prev = line
+    return out, pos
+
+
+def _unpack_table(depth: int, scale: bool) -> list:
+    """byte -> its 8/depth samples, optionally scaled to 0..255 (grey)."""
+    per = 8 // depth
+    mask = (1 << depth) - 1
+    mul = 255 // mask if scale else 1
+    table = []
+    for b in range(256):
+        table.append(bytes(((b >> (8 - depth * (k + 1))) & mask) * mul for k in range(per)))
+    return table
+
+
+class _Converter:
+    """Turns one unfiltered scanline into RGBA bytes."""
+
+    def __init__(self, ctype: int, depth: int, plte: bytes, trns: bytes):
+        self.ctype = ctype
+        self.depth = depth
+        self.table = _unpack_table(depth, ctype == 0) if depth < 8 else None
+        self.key = None
+        if ctype == 3:
+            n = len(plte) // 3
+            alpha = trns + b"\xff" * (256 - len(trns))
+            pad = b"\x00" * (256 - n)
+            self.lut = [plte[0::3][:n] + pad, plte[1::3][:n] + pad, plte[2::3][:n] + pad, alpha[:256]]
+        elif ctype == 0 and len(trns) >= 2:
+            v = struct.unpack(">H", trns[:2])[0]
+            self.key = bytes([v * (255 // ((1 << depth) - 1)) if depth < 8 else v >> 8 if depth == 16 else v])
+        elif ctype == 2 and len(trns) >= 6:
+            r, g, b = struct.unpack(">HHH", trns[:6])
+            if depth == 16:
+                r, g, b = r >> 8, g >> 8, b >> 8
+            self.key = bytes([r, g, b])
+
+    def samples(self, line: bytes, count: int) -> bytes:
+        if self.table is not None:
+            return b"".join(self.table[b] for b in line)[:count]
+        if self.depth == 16:
+            return bytes(line[0::2])
+        return bytes(line)
+
+    def __call__(self, line: bytes, width: int) -> bytearray:
+        ch = _CHANNELS[self.ctype]
+        s = self.samples(line, width * ch)
+        out = bytearray(width * 4)
+        if self.ctype == 6:
+            out[:] = s
+        elif self.ctype == 3:
+            for c in range(4):
+                out[c::4] = s.translate(self.lut[c])
+        elif self.ctype == 2:
+            out[0::4], out[1::4], out[2::4] = s[0::3], s[1::3], s[2::3]
+            out[3::4] = b"\xff" * width
+            if self.key is not None:
+                for i in range(width):
+                    if s[i * 3:i * 3 + 3] == self.key:
+                        out[i * 4 + 3] = 0
+        elif self.ctype == 4:
+            g = s[0::2]
+            out[0::4], out[1::4], out[2::4], out[3::4] = g, g, g, s[1::2]
+        else:  # 0: grey
+            out[0::4], out[1::4], out[2::4] = s, s, s
+            if self.key is not None:
+                out[3::4] = s.translate(bytes(0 if bytes([v]) == self.key else 255 for v in range(256)))
+            else:
+                out[3::4] = b"\xff" * width
+        return out
+
+
+def decode_png(data: bytes) -> RGBAImage:
+    if not data.startswith(PNG_SIG):
+        raise ValueError("Not a PNG file")
+    pos = 8
+    ihdr = None
+    plte = b""
+    trns = b""
+    idat = []
+    while pos + 8 <= len(data):
+        length, ctype = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if ctype == b"IHDR":
+            ihdr = struct.unpack(">IIBBBBB", body[:13])
+        elif ctype == b"PLTE":
+            plte = body
+        elif ctype == b"tRNS":
+            trns = body
+        elif ctype == b"IDAT":
+            idat.append(body)
+        elif ctype == b"IEND":
+            break
+    if ihdr is None:
+        raise ValueError("PNG without IHDR")
+
+    w, h, depth, color, _comp, _filt, interlace = ihdr
+    if color not in _CHANNELS or depth not in (1, 2, 4, 8, 16):
+        raise ValueError(f"Unsupported PNG colour type {color} / depth {depth}")
+    if color == 3 and not plte:
+        raise ValueError("Palette PNG without PLTE")
+
+    raw = zlib.decompress(b"".join(idat))
+    bits = _CHANNELS[color] * depth
+    bpp = max(1, bits // 8)
+    convert = _Converter(color, depth, plte, trns)
+
+    if not interlace:
+        rows, _ = _unfilter(raw, 0, h, (w * bits + 7) // 8, bpp)
+        pixels = bytearray()
+        for line in rows:
+            pixels += convert(line, w)
+        return RGBAImage(w, h, pixels)
+
+    # Adam7: decode each reduced image, then scatter its pixels
+    px = array(_PX, bytes(w * h * 4))
+    pos = 0
+    for xs, ys, xd, yd in _ADAM7:
+        pw = (w - xs + xd - 1) // xd
+        ph = (h - ys + yd - 1) // yd
+        if pw <= 0 or ph <= 0:
+            continue
+        rows, pos = _unfilter(raw, pos, ph, (pw * bits + 7) // 8, bpp)
+        for r, line in enumerate(rows):
+            start = (ys + r * yd) * w + xs
+            px[start:start + (pw - 1) * xd + 1:xd] = array(_PX, bytes(convert(line, pw)))
+    return RGBAImage(w, h, bytearray(px.tobytes()))
+
+
+def read_png(path: Path) -> RGBAImage:
+    return decode_png(path.read_bytes())
+
+
+def _read_exact(f: BinaryIO, n: int) -> bytes:
+    data = f.read(n)
+    if len(data) != n:
+        raise ValueError("Truncated PNG")
+    return data
+
+
+def iter_png_rows(f: BinaryIO) -> Iterator[bytearray]:
+    """
+    Yields the rows of a non-interlaced PNG as RGBA bytes, top to bottom, reading
+    and inflating one IDAT chunk at a time. Raises ValueError (or zlib.error) on a
+    truncated or corrupt file, possibly after some rows were already yielded.
+    """
+    if _read_exact(f, 8) != PNG_SIG:
+        raise ValueError("Not a PNG file")
+    ihdr = None
+    plte = b""
+    trns = b""
+    inflater = zlib.decompressobj()
+    pending = b""
+    prev = None
+    done = 0
+    while True:
+        length, ctype = struct.unpack(">I4s", _read_exact(f, 8))
+        body = _read_exact(f, length)
+        _read_exact(f, 4)  # CRC
+        if ctype == b"IHDR":
+            ihdr = struct.unpack(">IIBBBBB", body[:13])
+            w, h, depth, color, _comp, _filt, interlace = ihdr
+            if color not in _CHANNELS or depth not in (1, 2, 4, 8, 16):
+                raise ValueError(f"Unsupported PNG colour type {color} / depth {depth}")
+            if interlace:
+                raise ValueError("Interlaced PNGs can't be streamed row by row")
+            bits = _CHANNELS[color] * depth
+            bpp = max(1, bits // 8)
+            row_bytes = (w * bits + 7) // 8
+        elif ctype == b"PLTE":
+            plte = body
+        elif ctype == b"tRNS":
+            trns = body
+        elif ctype == b"IDAT":
+            if ihdr is None:
+                raise ValueError("PNG without IHDR")
+            if prev is None:
+                if color == 3 and not plte:
+                    raise ValueError("Palette PNG without PLTE")
+                convert = _Converter(color, depth, plte, trns)
+                prev = bytearray(row_bytes)
+            pending += inflater.decompress(body)
+            n = min(len(pending) // (row_bytes + 1), h - done)
+            if n:
+                rows, pos = _unfilter(pending, 0, n, row_bytes, bpp, prev)
+                pending = pending[pos:]
+                for line in rows:
+                    yield convert(line, w)
+                prev = rows[-1]
+                done += n
+        elif ctype == b"IEND":
+            break
+    if ihdr is None or done < h:
+        raise ValueError("Truncated PNG")
+
+
+# -----------------------------
+# Encoding
+# -----------------------------
+def _chunk(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+
+
+def _zlib_header(level: int) -> bytes:
+    # CMF: deflate, 32K window; FLG: FLEVEL hint + FCHECK so the pair is a multiple of 31
+    cmf = 0x78
+    flevel = 0 if level in (0, 1) else 1 if level < 6 else 2 if level in (6, -1) else 3
+    flg = flevel << 6
+    flg |= 31 - (cmf * 256 + flg) % 31
+    return bytes((cmf, flg))
+
+
+# byte -> |byte as signed int8|, for the "minimum sum of absolute differences" filter pick
+_ABS = bytes(min(b, 256 - b) for b in range(256))
+
+
+def _sub_bytes(a: int, b: int, hi: int) -> int:
+    """
+    Lane-wise (a - b) mod 256 of two rows packed into ints, one byte per lane.
+    hi has 0x80 in every lane: setting it in a and clearing it in b means no lane
+    borrows from its neighbour, and the xor puts the real top bit back.
+    """
+    return ((a | hi) - (b & ~hi)) ^ (~(a ^ b) & hi)
+
+
+def _filter_row(row, prev: int, hi: int) -> Tuple[bytes, int]:
+    """
+    Picks None, Sub or Up for one RGBA row, whichever gives the smallest sum of
+    absolute (signed) bytes, and returns (filter byte + filtered row, row as int).
+    Paeth/Average would need per-byte Python work; Sub and Up are whole-row int
+    arithmetic, which keeps encoding a page in the same ballpark as filter 0.
+    """
+    n = len(row)
+    cur = int.from_bytes(row, "big")
+    best = bytes(row)
+    best_type = 0
+    best_score = sum(best.translate(_ABS))
+    for ftype, pred in ((1, cur >> 32), (2, prev)):
+        out = _sub_bytes(cur, pred, hi).to_bytes(n, "big")
+        score = sum(out.translate(_ABS))
+        if score < best_score:
+            best, best_type, best_score = out, ftype, score
+    return bytes((best_type,)) + best, cur
+
+
+def _deflate_block(data: bytes, zdict: bytes, level: int, last: bool) -> bytes:
+    """
+    Raw deflate of one block. Non-final blocks end with a sync flush so they stop
+    on a byte boundary and the next block's output can simply be appended.
+    """
+    if zdict:
+        z = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        z = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return z.compress(data) + z.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class PngWriter:
+    """
+    Streams an 8-bit RGBA PNG: write_row() per scanline (top to bottom), then close().
+    Each row gets the cheapest of filters None/Sub/Up (see _filter_row); compressed
+    data goes out in IDAT chunks of about IDAT_CHUNK bytes.
+
+    jobs > 1 deflates DEFLATE_BLOCK-sized groups of rows on a thread pool. At most
+    2 * jobs blocks are in flight, so memory stays bounded like the serial path.
+    """
+
+    def __init__(self, f: BinaryIO, width: int, height: int, level: int = 6, jobs: int = 1):
+        self.f = f
+        self.width = width
+        self.height = height
+        self.level = level
+        self.rows = 0
+        self._buf = bytearray()
+        self._prev = 0  # previous row as an int; 0 is the all-zero row above the first
+        self._hi = int.from_bytes(b"\x80" * (width * 4), "big")
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if jobs > 1:
+            self._pool = ThreadPoolExecutor(max_workers=jobs)
+            self._max_pending = 2 * jobs
+            self._pending: deque = deque()
+            self._block = bytearray()
+            self._window = b""
+            self._adler = 1
+            self._started = False
+        else:
+            self._z = zlib.compressobj(level)
+        f.write(PNG_SIG)
+        f.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+
+    def _emit(self, data: bytes, force: bool = False) -> None:
+        self._buf += data
+        while len(self._buf) >= IDAT_CHUNK or (force and self._buf):
+            part = bytes(self._buf[:IDAT_CHUNK])
+            del self._buf[:IDAT_CHUNK]
+            self.f.write(_chunk(b"IDAT", part))
+
+    def _submit(self, last: bool) -> None:
+        data = bytes(self._block)
+        self._block = bytearray()
+        self._adler = zlib.adler32(data, self._adler)
+        self._pending.append(self._pool.submit(_deflate_block, data, self._window, self.level, last))
+        tail = data if len(data) >= DEFLATE_WINDOW else self._window + data
+        self._window = tail[-DEFLATE_WINDOW:]
+        while len(self._pending) > (0 if last else self._max_pending):
+            self._drain_one()
+
+    def _drain_one(self) -> None:
+        if not self._started:
+            self._emit(_zlib_header(self.level))
+            self._started = True
+        self._emit(self._pending.popleft().result())
+
+    def write_row(self, row) -> None:
+        if len(row) != self.width * 4:
+            raise ValueError(f"Row has {len(row)} bytes, expected {self.width * 4}")
+        line, self._prev = _filter_row(row, self._prev, self._hi)
+        if self._pool is not None:
+            self._block += line
+            if len(self._block) >= DEFLATE_BLOCK:
+                self._submit(last=False)
+        else:
+            self._emit(self._z.compress(line))
+        self.rows += 1
+
+    def close(self) -> None:
+        if self.rows != self.height:
+            raise ValueError(f"Wrote {self.rows} rows, expected {self.height}")
+        if self._pool is not None:
+            try:
+                self._submit(last=True)
+            finally:
+                self._pool.shutdown()
+            self._emit(struct.pack(">I", self._adler), force=True)
+        else:
+            self._emit(self._z.flush(), force=True)
+        self.f.write(_chunk(b"IEND", b""))
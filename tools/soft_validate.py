@@ -3,14 +3,14 @@ from pathlib import Path
 from datetime import datetime
 
 from tools.config import PATHS, ILLEGAL_CHARS, MAX_STEM_LEN, ALLOWED_EXT, MAX_FILE_MB, CATEGORY_ORDER
+from tools.file_index import CATEGORY_DIRS, FileIndex, shared_index
 
-def validate_dir(d: Path, problems: list[str]):
-    for f in sorted(d.iterdir()):
-        if not f.is_file():
-            continue
+def validate_dir(d: Path, problems: list[str], index: FileIndex | None = None):
+    for entry in (index or shared_index()).files(d):
+        f = entry.path
 
         # ext
-        if f.suffix.lower() not in ALLOWED_EXT:
+        if entry.ext not in ALLOWED_EXT:
             problems.append(f"BAD_EXT: {f} (ext={f.suffix})")
 
         # illegal chars
@@ -22,7 +22,7 @@ def validate_dir(d: Path, problems: list[str]):
             problems.append(f"NAME_TOO_LONG: {f.name} (len={len(f.stem)})")
 
         # size
-        size_mb = f.stat().st_size / (1024 * 1024)
+        size_mb = entry.size / (1024 * 1024)
         if size_mb > MAX_FILE_MB:
             problems.append(f"FILE_TOO_BIG: {f} ({size_mb:.2f} MB)")
 
@@ -30,19 +30,8 @@ def main():
     PATHS.reports_dir.mkdir(parents=True, exist_ok=True)
 
     problems: list[str] = []
-    cat_dirs = {
-        "ui": PATHS.ui,
-        "cosmetics": PATHS.cosmetics,
-        "effects": PATHS.effects,
-        "backgrounds": PATHS.backgrounds,
-        "pet": PATHS.pet,
-        "_unmapped": PATHS.unmapped,
-    }
-
     for cat in CATEGORY_ORDER:
-        d = cat_dirs[cat]
-        if d.exists():
-            validate_dir(d, problems)
+        validate_dir(CATEGORY_DIRS[cat], problems)
 
     report = PATHS.reports_dir / "soft_validation.txt"
     header = f"Soft validation report | {datetime.utcnow().isoformat()}Z\n"